@@ -0,0 +1,178 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+)
+import os
+import threading
+import multiprocessing
+from concurrent import futures
+
+import aaf2
+
+# Handle owned by a worker process and the event its pool sets on close, see _initProcess
+_process_file = None
+_process_closed = None
+
+# Pool running the current job on a worker thread, see cancelled()
+_worker = threading.local()
+
+class Cancelled(Exception):
+    """Raised by jobs that stop early because their pool was closed"""
+
+def cancelled():
+    """
+    True once the pool running the calling job has been closed
+
+    Long jobs check this between chunks or mobs and raise Cancelled, so closing a pool never
+    waits for them. Always False outside pool workers.
+    """
+    if _process_closed is not None:
+        return _process_closed.is_set()
+    pool = getattr(_worker, 'pool', None)
+    return pool is not None and pool.closed
+
+def _initProcess(path, closed):
+    global _process_file, _process_closed
+    _process_file = aaf2.open(path, 'r')
+    _process_closed = closed
+
+def _runInProcess(func, args):
+    return func(_process_file, *args)
+
+class AAFReaderPool(object):
+    """
+    Read-only access to one AAF file from background workers
+
+    Decoding is pure Python and holds the GIL, so only processes=True spreads CPU bound jobs
+    (queries, hashing, layouts) over several cores. Threads suit jobs that mostly wait on disk.
+
+    pyaaf2 keeps a file position and object caches per opened file, so a handle must never be
+    shared between threads. Every worker thread (or process) opens its own handle to the same
+    path on first use and reads through it without any locking. The GUI keeps its own handle.
+
+    Jobs are called as func(aaf_file, *args) with the worker's handle. They must return plain data
+    (strings, numbers, MobIDs, tuples...) rather than aaf2 objects, which belong to the worker's handle.
+    Callbacks run through dispatch, which the viewer points at the GUI thread so model updates
+    never happen on a worker.
+    """
+
+    def __init__(self, path, max_workers=None, processes=False, dispatch=None):
+        self.path = path
+        self.processes = processes
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.dispatch = dispatch
+        self.local = threading.local()
+        self.handles = []
+        self.busy = set()  # ids of handles a job is reading through, close() leaves them to their worker
+        self.handles_lock = threading.Lock()  # Guards handles and busy
+        self.closed = False
+
+        if processes:
+            context = multiprocessing.get_context()
+            self.process_closed = context.Event()
+            self.executor = futures.ProcessPoolExecutor(self.max_workers, mp_context=context,
+                                                        initializer=_initProcess,
+                                                        initargs=(path, self.process_closed))
+        else:
+            self.executor = futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix="aaf-reader")
+
+    def handle(self):
+        """Return the calling thread's own read-only handle"""
+        f = getattr(self.local, 'aaf_file', None)
+        if f is None:
+            f = aaf2.open(self.path, 'r')
+            self.local.aaf_file = f
+            with self.handles_lock:
+                self.handles.append(f)
+        return f
+
+    def _run(self, func, args):
+        f = self.handle()
+        # Checked under the lock close() takes, so close() never closes a handle a job is about to use
+        with self.handles_lock:
+            closing = self.closed
+            if not closing:
+                self.busy.add(id(f))
+        if closing:
+            self._closeHandle(f)
+            raise Cancelled()
+
+        _worker.pool = self
+        try:
+            return func(f, *args)
+        finally:
+            _worker.pool = None
+            with self.handles_lock:
+                self.busy.discard(id(f))
+                closing = self.closed
+            if closing:
+                self._closeHandle(f)
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Run func(aaf_file, *args) on a worker and return its future
+
+        Args:
+            callback: Optional callable receiving the result, run through dispatch
+            errback: Optional callable receiving the exception, run through dispatch
+        """
+        callback = kwargs.pop('callback', None)
+        errback = kwargs.pop('errback', None)
+
+        if self.processes:
+            future = self.executor.submit(_runInProcess, func, args)
+        else:
+            future = self.executor.submit(self._run, func, args)
+
+        if callback or errback:
+            def done(future):
+                if future.cancelled() or self.closed:
+                    return
+                error = future.exception()
+                if error is None:
+                    if callback:
+                        self._dispatch(callback, future.result())
+                elif errback:
+                    self._dispatch(errback, error)
+            future.add_done_callback(done)
+        return future
+
+    def map(self, func, items):
+        """Run func(aaf_file, item) for every item and yield the results in order"""
+        jobs = [self.submit(func, item) for item in items]
+        for job in jobs:
+            yield job.result()
+
+    def _dispatch(self, func, value):
+        if self.dispatch is None:
+            func(value)
+        else:
+            self.dispatch(lambda: func(value))
+
+    def _closeHandle(self, f):
+        with self.handles_lock:
+            if f not in self.handles:
+                return
+            self.handles.remove(f)
+        try:
+            f.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """
+        Cancel pending jobs and close worker handles without waiting for running jobs
+
+        Handles in use are closed by their worker when its job returns, jobs checking
+        cancelled() stop at their next check. Results of jobs still running are dropped.
+        """
+        with self.handles_lock:
+            self.closed = True
+            idle = [f for f in self.handles if id(f) not in self.busy]
+        if self.processes:
+            self.process_closed.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for f in idle:
+            self._closeHandle(f)
@@ -0,0 +1,439 @@
+"""
+Structured queries over the objects of an AAF file
+
+    class:SourceClip and length>1000 and mob.name~"A001"
+    class:Mob and (usage=TopLevel or name~reel) and not slots.segment.class:Filler
+
+A term is ``field op value``. Operators are ``=`` ``!=`` ``>`` ``>=`` ``<`` ``<=``, ``~`` for a
+case-insensitive substring and ``:`` which is ``=`` except for ``class:``, which matches the
+class or any of its superclasses. ``!=`` matches when no value equals, so ``class!=Segment``
+excludes every subclass too. Terms combine with ``and``, ``or``, ``not`` and parentheses.
+
+Fields are property names in any letter case (``length`` finds ``Length``) and may follow references with dots,
+``slots.segment.length``. A path that reaches several objects matches if any of them does.
+``mob.`` reads from the mob holding the object, ``class`` is the class name, ``mobid`` the MobID
+urn and ``usage`` the usage code without its ``Usage_`` prefix. An unquoted value runs to the next
+space or parenthesis, so ``mobid=urn:smpte:umid:...`` needs no quotes.
+
+Queries are parsed once into nested Python closures. Positive ``class:`` terms of the top-level
+``and`` are pulled out by the planner and checked first with a cached class lookup, so the rest
+of the query only runs on objects of those classes, and queries that only match mobs do not
+descend into them. Every other object is still visited, the walk reads the references of each.
+Field names are resolved once per class through classdef_cache.property_name().
+
+Usage: python aaf_query.py file.aaf 'class:SourceClip and length>1000' [--count]
+"""
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+)
+import re
+
+import aaf2
+import classdef_cache
+from aaf_access import Cancelled, cancelled
+
+class QueryError(ValueError):
+    pass
+
+_TOKEN = re.compile(r'''
+    \s*(?:
+      (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+    | (?P<op>>=|<=|!=|==|=|>|<|~|:)
+    | (?P<paren>[()])
+    | (?P<word>[^\s()<>=!~:"']+)
+    )''', re.VERBOSE)
+
+# Values may contain operator characters, e.g. mobid=urn:smpte:umid:...
+_VALUE = re.compile(r'''\s*(?P<word>[^\s()"']+)''')
+
+_KEYWORDS = ("and", "or", "not")
+
+def tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = None
+        after_op = bool(tokens) and tokens[-1][0] == "op"
+        if after_op:
+            match = _VALUE.match(text, pos)
+        if match is None:
+            match = _TOKEN.match(text, pos)
+        if not match or match.end() == pos:
+            raise QueryError("Unexpected character at %d: %r" % (pos, text[pos:pos + 10]))
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "string":
+            value = re.sub(r'\\(.)', r'\1', value[1:-1])
+        elif kind == "word" and value.lower() in _KEYWORDS and not after_op:
+            kind = value.lower()
+        tokens.append((kind, value))
+    return tokens
+
+class Term(object):
+    def __init__(self, field, op, value):
+        self.field = field
+        self.op = op
+        self.value = value
+
+class BoolOp(object):
+    def __init__(self, op, children):
+        self.op = op
+        self.children = children
+
+class _Parser(object):
+
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None)
+
+    def take(self, kind=None):
+        token = self.peek()
+        if token[0] is None or (kind and token[0] != kind):
+            raise QueryError("Expected %s, got %s" % (kind or "more input", token[1] or "end of query"))
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise QueryError("Empty query")
+        node = self.parseOr()
+        if self.peek()[0] is not None:
+            raise QueryError("Unexpected %r" % self.peek()[1])
+        return node
+
+    def parseOr(self):
+        children = [self.parseAnd()]
+        while self.peek()[0] == "or":
+            self.take()
+            children.append(self.parseAnd())
+        return children[0] if len(children) == 1 else BoolOp("or", children)
+
+    def parseAnd(self):
+        children = [self.parseNot()]
+        while self.peek()[0] in ("and", "not", "word", "paren") and self.peek()[1] != ")":
+            # Adjacent terms are an implicit and
+            if self.peek()[0] == "and":
+                self.take()
+            children.append(self.parseNot())
+        return children[0] if len(children) == 1 else BoolOp("and", children)
+
+    def parseNot(self):
+        if self.peek()[0] == "not":
+            self.take()
+            return BoolOp("not", [self.parseNot()])
+        if self.peek() == ("paren", "("):
+            self.take()
+            node = self.parseOr()
+            if self.take("paren")[1] != ")":
+                raise QueryError("Expected )")
+            return node
+        field = self.take("word")[1]
+        op = self.take("op")[1]
+        if op == "==":
+            op = "="
+        kind, value = self.take()
+        if kind not in ("word", "string"):
+            raise QueryError("Expected a value after %s%s" % (field, op))
+        return Term(field, op, value)
+
+def parse(text):
+    """Parse text into a tree of Term and BoolOp nodes"""
+    return _Parser(text).parse()
+
+# Field compilation
+
+def _property(obj, name):
+    """Property of obj called name in any letter case, None when it is not set"""
+    real = classdef_cache.property_name(obj, name)
+    if real is None:
+        return None
+    # allkeys=False: a property the object does not hold has no value to match
+    return obj.get(real, allkeys=False)
+
+def _name(obj):
+    name = _property(obj, 'Name')
+    return name.value if name is not None else ""
+
+def _follow(values, name):
+    """Step every object in values to its property name, expanding references and lists"""
+    result = []
+    for obj in values:
+        if not isinstance(obj, aaf2.core.AAFObject):
+            continue
+        p = _property(obj, name)
+        if p is None:
+            continue
+        try:
+            value = p.value
+        except Exception:
+            continue
+        if isinstance(value, (list, tuple)):
+            result.extend(value)
+        elif isinstance(p, aaf2.properties.StrongRefSetProperty):
+            result.extend(p.values())
+        else:
+            result.append(value)
+    return result
+
+def _special(name):
+    """Getter for the pseudo fields, or None"""
+    name = name.lower()
+    if name == "class":
+        return lambda obj: classdef_cache.class_chain(obj) if isinstance(obj, aaf2.core.AAFObject) else ()
+    if name in ("mobid", "mob_id"):
+        return lambda obj: [obj.mob_id.urn] if isinstance(obj, aaf2.mobs.Mob) else []
+    if name == "usage":
+        def usage(obj):
+            if not isinstance(obj, aaf2.mobs.Mob):
+                return []
+            value = obj.get('UsageCode', allkeys=False)
+            if value is None or not value.value:
+                return []
+            value = str(value.value)
+            return [value[len("Usage_"):] if value.startswith("Usage_") else value]
+        return usage
+    return None
+
+def compile_field(field):
+    """Return getter(obj, mob) -> list of values for a dotted field"""
+    steps = field.split(".")
+    use_mob = steps[0].lower() == "mob" and len(steps) > 1
+    if use_mob:
+        steps = steps[1:]
+
+    last = _special(steps[-1])
+    path = steps[:-1] if last else steps
+
+    def getter(obj, mob):
+        values = [mob if use_mob else obj]
+        for name in path:
+            values = _follow(values, name)
+            if not values:
+                return values
+        if last is None:
+            return values
+        result = []
+        for value in values:
+            result.extend(last(value))
+        return result
+    return getter
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+_lowered = {}
+
+def _lowerChain(chain):
+    lowered = _lowered.get(chain)
+    if lowered is None:
+        lowered = _lowered[chain] = frozenset(name.lower() for name in chain)
+    return lowered
+
+def compile_term(term):
+    """Return predicate(obj, mob) for a Term"""
+    op = term.op
+    if op == "!=":
+        # A multi-valued field differs when no value equals, not when some value differs
+        equals = compile_term(Term(term.field, "=", term.value))
+        return lambda obj, mob: not equals(obj, mob)
+
+    getter = compile_field(term.field)
+    text = term.value.lower()
+    number = _number(term.value)
+
+    if term.field.split(".")[-1].lower() == "class" and op in (":", "="):
+        # Class terms match superclasses too, ClassInfo chains are shared tuples
+        field_steps = term.field.split(".")
+        if len(field_steps) == 1:
+            def is_class(obj, mob):
+                if not isinstance(obj, aaf2.core.AAFObject):
+                    return False
+                return text in _lowerChain(classdef_cache.class_chain(obj))
+            return is_class
+        parent = compile_field(".".join(field_steps[:-1])) if field_steps[:-1] != ["mob"] else None
+
+        def has_class(obj, mob):
+            values = [mob] if parent is None else parent(obj, mob)
+            for value in values:
+                if isinstance(value, aaf2.core.AAFObject) and text in _lowerChain(classdef_cache.class_chain(value)):
+                    return True
+            return False
+        return has_class
+
+    if op == "~":
+        def test(value):
+            return text in str(value).lower()
+    elif op in (":", "="):
+        def test(value):
+            if number is not None:
+                value_number = _number(value)
+                if value_number is not None:
+                    return value_number == number
+            return str(value).lower() == text
+    else:
+        if number is None:
+            raise QueryError("%s needs a number, got %r" % (op, term.value))
+        compare = {
+            ">": lambda a: a > number,
+            ">=": lambda a: a >= number,
+            "<": lambda a: a < number,
+            "<=": lambda a: a <= number,
+        }[op]
+
+        def test(value):
+            value = _number(value)
+            return value is not None and compare(value)
+
+    def predicate(obj, mob):
+        for value in getter(obj, mob):
+            if test(value):
+                return True
+        return False
+    return predicate
+
+def compile_node(node):
+    if isinstance(node, Term):
+        return compile_term(node)
+
+    children = [compile_node(child) for child in node.children]
+    if node.op == "not":
+        child = children[0]
+        return lambda obj, mob: not child(obj, mob)
+    if node.op == "and":
+        return lambda obj, mob: all(child(obj, mob) for child in children)
+    return lambda obj, mob: any(child(obj, mob) for child in children)
+
+# Planning
+
+def _isClassTerm(node):
+    return isinstance(node, Term) and node.field.lower() == "class" and node.op in (":", "=")
+
+class Query(object):
+    """
+    A compiled query
+
+    classes holds the lowercased class names every match must have (from the top-level and),
+    predicate the rest of the query, mobs_only is set when only mobs can match.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        tree = parse(text)
+
+        conjuncts = tree.children if isinstance(tree, BoolOp) and tree.op == "and" else [tree]
+        self.classes = [node.value.lower() for node in conjuncts if _isClassTerm(node)]
+        rest = [node for node in conjuncts if not _isClassTerm(node)]
+
+        if not rest:
+            self.predicate = None
+        elif len(rest) == 1:
+            self.predicate = compile_node(rest[0])
+        else:
+            self.predicate = compile_node(BoolOp("and", rest))
+
+        self.mobs_only = any(name == "mob" or name.endswith("mob") for name in self.classes)
+
+    def classMatches(self, obj):
+        if not self.classes:
+            return True
+        chain = _lowerChain(classdef_cache.class_chain(obj))
+        for name in self.classes:
+            if name not in chain:
+                return False
+        return True
+
+    def matches(self, obj, mob):
+        if not self.classMatches(obj):
+            return False
+        return self.predicate is None or bool(self.predicate(obj, mob))
+
+    def run(self, aaf_file, limit=None):
+        """Yield (object, mob, steps) for every match, steps lead from the mob to the object"""
+        count = 0
+        for mob in aaf_file.content.mobs:
+            if cancelled():
+                raise Cancelled()
+            nodes = [(mob, [])] if self.mobs_only else walk(mob)
+            for obj, steps in nodes:
+                if self.matches(obj, mob):
+                    yield obj, mob, steps
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+
+def walk(obj, steps=None):
+    """
+    Yield (object, steps) for obj and every object it strongly references
+
+    steps are the property names and rows leading from obj to each object, in the
+    form AAFModel.indexForPath takes. Set members are ordered like TreeItem orders them.
+    """
+    steps = steps or []
+    yield obj, steps
+    for p in obj.properties():
+        if isinstance(p, aaf2.properties.StrongRefProperty):
+            child = p.value
+            if child is not None:
+                for item in walk(child, steps + [p.name, 0]):
+                    yield item
+        elif isinstance(p, aaf2.properties.StrongRefVectorProperty):
+            for row, child in enumerate(p):
+                for item in walk(child, steps + [p.name, row]):
+                    yield item
+        elif isinstance(p, aaf2.properties.StrongRefSetProperty):
+            for row, key in enumerate(sorted(p.references.keys())):
+                for item in walk(p.get(key), steps + [p.name, row]):
+                    yield item
+
+def run_query(aaf_file, text, limit=None):
+    """
+    Return [(mob urn, steps, class name, name)] for every match
+
+    Plain data only, so it can run on an AAFReaderPool worker.
+    """
+    query = Query(text)
+    result = []
+    for obj, mob, steps in query.run(aaf_file, limit):
+        result.append((mob.mob_id.urn, steps, classdef_cache.class_name(obj), _name(obj)))
+    return result
+
+def main():
+    from optparse import OptionParser
+
+    parser = OptionParser(usage="%prog [options] file.aaf query")
+    parser.add_option('-c', '--count', action="store_true", default=False)
+    parser.add_option('-l', '--limit', type="int", default=None)
+    (options, args) = parser.parse_args()
+    if len(args) != 2:
+        parser.error("expected a file and a query")
+
+    try:
+        query = Query(args[1])
+    except QueryError as e:
+        parser.error(str(e))
+
+    with aaf2.open(args[0], 'r') as f:
+        count = 0
+        for obj, mob, steps in query.run(f, options.limit):
+            count += 1
+            if not options.count:
+                print("%s\t%s\t%s\t%s" % (mob.name, classdef_cache.class_name(obj), _name(obj),
+                                          "/".join(str(step) for step in steps)))
+        if options.count:
+            print(count)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# AAF traversal and formatting behind qt_aafmodel.AAFModel, kept free of Qt
+# so headless tools can walk a file the same way the viewer shows it.
+# TreeItem originally from https://github.com/markreidvfx/pyaaf2/blob/main/examples/qt_aafmodel.py
+
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+import bisect
+
+import aaf2
+from aaf2.mobid import MobID
+import classdef_cache
+
+class TreeItem(object):
+    # Tree items lazily mutate themselves in setup(), so in the viewer they are only touched from
+    # the GUI thread. Background work reads through aaf_access.AAFReaderPool handles instead.
+
+    def __init__(self, item, parent=None, index = 0):
+        self.parentItem = parent
+        self.item = item
+        self.children = {}
+        self.children_count = 0
+        self.properties = {}
+        self.loaded = False
+        self.index = index
+        self.references = []
+        self.mob_rows = None  # MobID -> row for list items, see rowForMobID
+        #self.getData()
+    def columnCount(self):
+        return 1
+
+    def childCount(self):
+        self.setup()
+        return self.children_count
+
+    def child(self,row):
+        self.setup()
+        if row in self.children:
+            return self.children[row]
+
+        if isinstance(self.item, aaf2.properties.StrongRefSetProperty):
+            key = self.references[row]
+            item = self.item.get(key)
+            t = TreeItem(item ,self, row)
+
+        elif isinstance(self.item, aaf2.properties.StrongRefVectorProperty):
+            item = self.item.get(row)
+            t = TreeItem(item ,self, row)
+        else:
+            return None
+        self.children[row] = t
+        return t
+
+    def childNumber(self):
+        self.setup()
+        return self.index
+
+    def parent(self):
+        self.setup()
+        return self.parentItem
+
+    def extend(self, items):
+        for i in items:
+            index = self.children_count
+            t = TreeItem(i,self, index)
+
+            self.children[index] = t
+            self.children_count += 1
+
+    def name(self):
+        item = self.item
+        if hasattr(item, 'name'):
+            name = item.name
+            if name:
+                return name
+        return self.class_name()
+
+    def class_name(self):
+        item = self.item
+        if isinstance(item, aaf2.core.AAFObject):
+            return classdef_cache.class_name(item)
+
+        if hasattr(item,"class_name"):
+            return item.class_name
+        else:
+            return item.__class__.__name__
+
+    def setup(self):
+        if self.loaded:
+            return
+
+        item = self.item
+        if isinstance(item, list):
+            self.extend(item)
+
+        if isinstance(item, aaf2.core.AAFObject):
+            self.extend(list(item.properties()))
+
+        elif isinstance(item, aaf2.properties.StrongRefProperty):
+            self.extend([item.value])
+
+        elif isinstance(item, aaf2.properties.StrongRefVectorProperty):
+            self.children_count = len(item)
+
+        elif isinstance(item, aaf2.properties.StrongRefSetProperty):
+            self.children_count = len(item)
+            self.references = list(item.references.keys())
+            self.references.sort()
+
+        elif isinstance(item, (aaf2.properties.Property)):
+            try:
+                v = str(item.value)
+            except:
+                v = "Error"
+
+            self.properties['Value'] = v
+
+        # add slot and mob references as children for convenience
+        if isinstance(item, aaf2.components.SourceClip):
+            mob = item.mob
+            if mob:
+                self.extend([mob])
+            slot = item.slot
+            if slot:
+                self.extend([slot])
+
+
+        self.properties['Name'] = self.name()
+        self.properties['Class'] = self.class_name()
+
+        self.loaded = True
+
+    def rowForProperty(self, name):
+        """Row of the child property called name, only AAFObject children are properties"""
+        self.setup()
+        for row in range(self.children_count):
+            child = self.children.get(row)
+            if child is not None and isinstance(child.item, aaf2.properties.Property) and child.item.name == name:
+                return row
+        return None
+
+    def rowForMob(self, mob):
+        """Row of mob if this item directly lists mobs, without creating the other rows"""
+        self.setup()
+        if isinstance(self.item, list):
+            # pyaaf2 caches mob objects, so identity almost always hits before decoding any MobID
+            for row, entry in enumerate(self.item):
+                if entry is mob:
+                    return row
+        return self.rowForMobID(mob.mob_id)
+
+    def rowForMobID(self, mob_id):
+        """Row of the child mob with mob_id, or None"""
+        self.setup()
+        if isinstance(self.item, aaf2.properties.StrongRefSetProperty):
+            row = bisect.bisect_left(self.references, mob_id)
+            if row < len(self.references) and self.references[row] == mob_id:
+                return row
+
+        elif isinstance(self.item, list):
+            if self.mob_rows is None:
+                self.mob_rows = {}
+                for row, entry in enumerate(self.item):
+                    entry_id = getattr(entry, 'mob_id', None)
+                    if entry_id is not None:
+                        self.mob_rows.setdefault(entry_id, row)
+            return self.mob_rows.get(mob_id)
+
+        else:
+            # Mobs added for convenience below a SourceClip
+            for row, child in self.children.items():
+                if isinstance(child.item, aaf2.mobs.Mob) and child.item.mob_id == mob_id:
+                    return row
+        return None
+
+    def step(self):
+        """Identity of this item below its parent that survives reloads and view changes"""
+        item = self.item
+        if isinstance(item, aaf2.properties.Property):
+            return item.name
+        if isinstance(item, aaf2.mobs.Mob):
+            return item.mob_id
+        return self.index
+
+    def rowForStep(self, step):
+        """Row of the child with the identity step() returned, or None"""
+        if isinstance(step, int):
+            return step if step < self.childCount() else None
+        if isinstance(step, MobID):
+            return self.rowForMobID(step)
+        return self.rowForProperty(step)
+
+    def rowTowardsMobs(self):
+        """Row of the child leading from Root/Header/ContentStorage down to the Mobs set"""
+        self.setup()
+        if isinstance(self.item, aaf2.core.AAFObject):
+            for name in ('Mobs', 'Content', 'Header'):
+                row = self.rowForProperty(name)
+                if row is not None:
+                    return row
+
+        elif isinstance(self.item, aaf2.properties.StrongRefProperty):
+            return 0
+        return None
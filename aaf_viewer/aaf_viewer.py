@@ -6,14 +6,43 @@ from __future__ import (
 )
 import sys
 from PySide2 import QtCore, QtWidgets, QtGui
-import aaf2
-from qt_aafmodel import AAFModel
+from mob_index import MobIndex, INDEX_FIELDS
+from view_state import TreeViewState
+
+# aaf2 and everything built on it (qt_aafmodel, aaf_access, timeline_view) is imported
+# on first use, so the window shows up without paying for them.
 
 class AAFViewer(QtWidgets.QMainWindow):
     def __init__(self):
         super(AAFViewer, self).__init__()
         self.setWindowTitle("AAF Viewer")
         self.current_view_index = 0  # Add current view index tracking
+        self.dispatcher = None  # Brings worker results back to the GUI thread, created with the first file
+        self.reader_pool = None  # Worker handles for the open file
+        self.classdef_cache_loaded = False
+
+        # Column widths are recomputed once the window stops resizing
+        self.resize_timer = QtCore.QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(50)
+        self.resize_timer.timeout.connect(self._onResizeSettled)
+
+        # Media locator results, see checkMediaLocators
+        self.media_resolver = None
+        self.locator_status = {}  # Locator URL -> media_resolver.LocatorStatus
+        self.mob_locators = {}  # Source mob urn -> locator URLs
+        self.locators_online = 0
+        self.locator_generation = 0  # Results from an earlier check or file are dropped
+        self.badge_icons = {}
+
+        # Embedded essence scan results, see scanEmbeddedEssence
+        self.essence_results = {}  # Source mob urn -> essence_scan.StreamResult
+        self.essence_problems = 0
+        self.essence_state = None  # essence_scan.ScanState of the running scan
+        self.essence_generation = 0
+
+        # Badges shown next to tree item names, each returns (QIcon, tooltip) or None
+        self.tree_decorators = [self._mediaBadge, self._essenceBadge]
 
 
         if sys.platform == 'win32':  # Windows
@@ -53,11 +82,21 @@ class AAFViewer(QtWidgets.QMainWindow):
         self.createSearchWidget()
         self.search_widget.hide()
 
+        # Create go to mob widget (initially hidden)
+        self.createGoToWidget()
+        self.goto_widget.hide()
+        self.mob_index = None
+        self.goto_results = []  # Mobs currently listed in the go to results
+
+        # Timeline widget is created the first time the tool is opened
+        self.timeline_widget = None
+
         # Add search related member variables
         self.search_results = []  # List to store search results
         self.current_search_index = -1  # Current position in search results
         self.search_text = ""  # Current search text
         self.search_type = "All Fields"  # Current search type
+        self.query_generation = 0  # Query results for an older search are dropped
         
         # Create menu bar
         self.createMenuBar()
@@ -134,6 +173,49 @@ class AAFViewer(QtWidgets.QMainWindow):
             "exclusive": False,
             "action": self.search_action
         }
+
+        # Go to mob tool
+        self.goto_action = QtWidgets.QAction("Go to Mob", self)
+        self.goto_action.setCheckable(True)
+        self.goto_action.setShortcut("Ctrl+G")
+        self.goto_action.triggered.connect(lambda checked: self.toggleTool("goto", checked))
+        tools_menu.addAction(self.goto_action)
+
+        self.tool_widgets["goto"] = {
+            "widget": self.goto_widget,
+            "exclusive": False,
+            "action": self.goto_action
+        }
+
+        # Timeline tool
+        self.timeline_action = QtWidgets.QAction("Timeline", self)
+        self.timeline_action.setCheckable(True)
+        self.timeline_action.setShortcut("Ctrl+T")
+        self.timeline_action.triggered.connect(lambda checked: self.toggleTool("timeline", checked))
+        tools_menu.addAction(self.timeline_action)
+
+        tools_menu.addSeparator()
+
+        # Media locator check
+        check_media_action = QtWidgets.QAction("Check Media Locators", self)
+        check_media_action.triggered.connect(self.checkMediaLocators)
+        tools_menu.addAction(check_media_action)
+
+        path_maps_action = QtWidgets.QAction("Media Path Mappings...", self)
+        path_maps_action.triggered.connect(self.editMediaPathMaps)
+        tools_menu.addAction(path_maps_action)
+
+        # Embedded essence integrity scan
+        scan_essence_action = QtWidgets.QAction("Scan Embedded Essence...", self)
+        scan_essence_action.triggered.connect(self.scanEmbeddedEssence)
+        tools_menu.addAction(scan_essence_action)
+
+        self.tool_widgets["timeline"] = {
+            "widget": self.timeline_widget,
+            "factory": self.createTimelineWidget,
+            "exclusive": False,
+            "action": self.timeline_action
+        }
         
         # Help menu
         help_menu = menubar.addMenu("Help")
@@ -177,6 +259,12 @@ class AAFViewer(QtWidgets.QMainWindow):
         self.toolbar_search_action.setCheckable(True)
         self.toolbar_search_action.triggered.connect(lambda checked: self.toggleTool("search", checked))
         toolbar.addAction(self.toolbar_search_action)
+
+        # Go to mob button with system icon
+        self.toolbar_goto_action = QtWidgets.QAction(QtGui.QIcon.fromTheme("go-jump"), "Go to Mob", self)
+        self.toolbar_goto_action.setCheckable(True)
+        self.toolbar_goto_action.triggered.connect(lambda checked: self.toggleTool("goto", checked))
+        toolbar.addAction(self.toolbar_goto_action)
     
     def createSearchWidget(self):
         """Create search widget and its components"""
@@ -190,7 +278,8 @@ class AAFViewer(QtWidgets.QMainWindow):
             "All Fields",
             "Name",
             "Value",
-            "Class"
+            "Class",
+            "Query"
         ])
         self.search_type.currentTextChanged.connect(self._onSearchTypeChanged)
         search_layout.addWidget(self.search_type)
@@ -217,12 +306,115 @@ class AAFViewer(QtWidgets.QMainWindow):
         
         self.layout.addWidget(self.search_widget)
 
+    def createGoToWidget(self):
+        """Create go to mob widget and its components"""
+        self.goto_widget = QtWidgets.QWidget()
+        goto_layout = QtWidgets.QVBoxLayout(self.goto_widget)
+        goto_layout.setContentsMargins(0, 0, 0, 0)
+
+        input_layout = QtWidgets.QHBoxLayout()
+
+        # Index field combo box
+        self.goto_field = QtWidgets.QComboBox()
+        self.goto_field.addItems(INDEX_FIELDS)
+        self.goto_field.currentTextChanged.connect(self._onGoToTextChanged)
+        input_layout.addWidget(self.goto_field)
+
+        # Lookups are index hits, so results follow every keystroke
+        self.goto_box = QtWidgets.QLineEdit()
+        self.goto_box.setPlaceholderText("MobID, UMID, name, usage or mob type...")
+        self.goto_box.textChanged.connect(self._onGoToTextChanged)
+        self.goto_box.returnPressed.connect(lambda: self._onGoToActivated(0))
+        input_layout.addWidget(self.goto_box)
+
+        self.goto_counter = QtWidgets.QLabel("0")
+        self.goto_counter.setMinimumWidth(60)
+        input_layout.addWidget(self.goto_counter)
+
+        goto_layout.addLayout(input_layout)
+
+        # Matching mobs
+        self.goto_list = QtWidgets.QListWidget()
+        self.goto_list.setMaximumHeight(120)
+        self.goto_list.itemActivated.connect(lambda item: self._onGoToActivated(self.goto_list.row(item)))
+        goto_layout.addWidget(self.goto_list)
+
+        self.layout.addWidget(self.goto_widget)
+
+    def _onGoToTextChanged(self, *args):
+        """Refresh go to results from the mob index"""
+        import classdef_cache
+
+        self.goto_list.clear()
+        self.goto_results = []
+        if self.mob_index is not None:
+            self.goto_results = self.mob_index.lookup(self.goto_box.text(), self.goto_field.currentText())
+
+        for mob in self.goto_results:
+            self.goto_list.addItem(f"{mob.name or ''}    [{classdef_cache.class_name(mob)}]    {mob.mob_id}")
+        self.goto_counter.setText(str(len(self.goto_results)))
+
+    def _onGoToActivated(self, row):
+        if 0 <= row < len(self.goto_results):
+            self.goToMob(self.goto_results[row])
+
+    def goToMob(self, mob, path=None):
+        """
+        Select mob in the active view, falling back to All Content for views without it
+
+        Args:
+            mob: Mob to select
+            path: Optional steps below the mob, see AAFModel.indexForPath
+        """
+        model = self.tree.model()
+        index = model.indexForMob(mob) if model else QtCore.QModelIndex()
+        if not index.isValid():
+            self.changeViewByIndex(self.view_names.index("All Content"))
+            model = self.tree.model()
+            if not model:
+                return
+            index = model.indexForMob(mob)
+            if not index.isValid():
+                return
+
+        if path:
+            target = model.indexForPath(index, path)
+            if target.isValid():
+                index = target
+
+        # scrollTo expands the parents, nothing else in the view is loaded
+        self.tree.setCurrentIndex(index)
+        self.tree.scrollTo(index)
+
     def createTreeView(self):
         """Create tree view widget"""
         self.tree = QtWidgets.QTreeView()
         self.tree.setAlternatingRowColors(True)
         self.tree.setUniformRowHeights(True)
-        self.layout.addWidget(self.tree)
+        self.view_state = TreeViewState(self.tree)
+        self.layout.addWidget(self.tree, 1)
+
+    def createTimelineWidget(self):
+        """Create timeline widget for composition mobs above the tree"""
+        from timeline_view import TimelineWidget
+
+        self.timeline_widget = TimelineWidget()
+        self.timeline_widget.clipClicked.connect(self.goToMob)
+        self.layout.insertWidget(self.layout.indexOf(self.tree), self.timeline_widget)
+        self._updateTimelineMobs()
+        return self.timeline_widget
+
+    def _updateTimelineMobs(self):
+        """Offer composition mobs in the timeline, top level ones first"""
+        if self.timeline_widget is None or self.mob_index is None:
+            return
+        toplevel = [self.mob_index.mobs[pos] for pos in self.mob_index.findUsage("toplevel")]
+        seen = set(id(mob) for mob in toplevel)
+        others = [self.mob_index.mobs[pos] for pos in self.mob_index.findType("compositionmob")
+                  if id(self.mob_index.mobs[pos]) not in seen]
+        # Track layouts are decoded on workers, the timeline only paints them
+        self.timeline_widget.setReaderPool(self.reader_pool)
+        self.timeline_widget.setMobs(toplevel + others)
     
     def openFile(self):
         file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
@@ -240,8 +432,38 @@ class AAFViewer(QtWidgets.QMainWindow):
             return
             
         try:
+            import aaf2
+            from aaf_access import AAFReaderPool
+            from qt_aafmodel import GuiDispatcher
+            import classdef_cache
+
+            # Class definitions decoded in earlier sessions
+            if not self.classdef_cache_loaded:
+                classdef_cache.load()
+                self.classdef_cache_loaded = True
+
             f = aaf2.open(self.current_file)
             self.aaf_file = f  # Save file object for later use
+
+            # Background workers never share the GUI handle. Queries, hashing and track layouts
+            # are CPU bound pure Python, worker processes keep them off the GIL the GUI needs.
+            if self.reader_pool is not None:
+                self.reader_pool.close()
+            if self.dispatcher is None:
+                self.dispatcher = GuiDispatcher(self)
+            self.reader_pool = AAFReaderPool(self.current_file, processes=True, dispatch=self.dispatcher.post)
+            self.locator_status = {}
+            self.mob_locators = {}
+            self.locator_generation += 1
+            self._flushEssenceState()
+            self.essence_state = None
+            self.essence_results = {}
+            self.essence_problems = 0
+            self.essence_generation += 1
+            self.query_generation += 1
+            self.mob_index = MobIndex(f.content.mobs)
+            self._onGoToTextChanged()
+            self._updateTimelineMobs()
             
             # Define view options after aaf_file is initialized
             self.view_options = {
@@ -314,10 +536,13 @@ class AAFViewer(QtWidgets.QMainWindow):
             
             # Access view function directly through dictionary
             if view_name in self.view_options:
+                from qt_aafmodel import AAFModel
+
                 root = self.view_options[view_name]()
                 model = AAFModel(root)
-                self.tree.setModel(model)
-                self.tree.expandToDepth(0)
+                model.decorators.extend(self.tree_decorators)
+                # Restores what was expanded when this view was last shown, only along those paths
+                self.view_state.setModel(model, (self.current_file, view_name))
                 
                 # Set column widths proportionally
                 total_width = self.tree.viewport().width()
@@ -345,6 +570,12 @@ class AAFViewer(QtWidgets.QMainWindow):
             
         tool_info = self.tool_widgets[tool_id]
         widget = tool_info["widget"]
+        if widget is None:
+            # Heavy tools are only built when first opened
+            if not checked:
+                return
+            widget = tool_info["factory"]()
+            tool_info["widget"] = widget
         exclusive = tool_info.get("exclusive", False)
         action = tool_info["action"]
         
@@ -363,6 +594,9 @@ class AAFViewer(QtWidgets.QMainWindow):
             action.setChecked(True)
             if tool_id == "search":
                 self.toolbar_search_action.setChecked(True)
+            elif tool_id == "goto":
+                self.toolbar_goto_action.setChecked(True)
+                self.goto_box.setFocus()
         else:
             # Close current tool
             self.active_tools.discard(tool_id)
@@ -372,15 +606,266 @@ class AAFViewer(QtWidgets.QMainWindow):
             action.setChecked(False)
             if tool_id == "search":
                 self.toolbar_search_action.setChecked(False)
+            elif tool_id == "goto":
+                self.toolbar_goto_action.setChecked(False)
 
     def distribute_width(self, total_width):
         self.tree.setColumnWidth(0, int(total_width * 0.3))
         self.tree.setColumnWidth(1, int(total_width * 0.5))
         self.tree.setColumnWidth(2, int(total_width * 0.2))
 
+    def checkMediaLocators(self):
+        """Collect every NetworkLocator on a worker, then check the paths concurrently"""
+        if self.reader_pool is None:
+            return
+        import media_resolver
+
+        if self.media_resolver is None:
+            self.media_resolver = media_resolver.LocatorResolver(path_maps=media_resolver.load_path_maps())
+        self.locator_generation += 1
+        generation = self.locator_generation
+        self.statusBar().showMessage("Collecting media locators...")
+        self.reader_pool.submit(media_resolver.collect_locators,
+                                callback=lambda locators: self._onLocatorsCollected(locators, generation),
+                                errback=self._onBackgroundError)
+
+    def editMediaPathMaps(self):
+        """Edit the prefixes that map locator paths written on other machines to local ones"""
+        import media_resolver
+
+        path_maps = media_resolver.load_path_maps()
+        text, ok = QtWidgets.QInputDialog.getMultiLineText(
+            self, "Media Path Mappings",
+            "One mapping per line, locator prefix = local prefix\n"
+            "e.g. C:/Media = /mnt/media or //nas/share = /Volumes/share",
+            media_resolver.format_path_maps(path_maps))
+        if not ok:
+            return
+        try:
+            path_maps = media_resolver.parse_path_maps(text)
+            media_resolver.save_path_maps(path_maps)
+        except (ValueError, IOError, OSError) as e:
+            QtWidgets.QMessageBox.warning(self, "Error", f"Cannot save path mappings:\n{str(e)}")
+            return
+
+        if self.media_resolver is not None:
+            self.media_resolver.path_maps = path_maps
+        # Badges shown so far were resolved with the old mappings
+        if self.locator_status:
+            self.checkMediaLocators()
+
+    def _onLocatorsCollected(self, locators, generation):
+        if generation != self.locator_generation:
+            return
+        self.locator_status = {}
+        self.mob_locators = {}
+        self.locators_online = 0
+        for urn, url in locators:
+            self.mob_locators.setdefault(urn, []).append(url)
+
+        urls = set(url for urn, url in locators)
+        if not urls:
+            self.statusBar().showMessage("No media locators found")
+            return
+
+        self.statusBar().showMessage(f"Checking {len(urls)} media locators...")
+        post = self.dispatcher.post
+        total = len(urls)
+        self.media_resolver.resolveAsync(
+            urls, lambda url, status: post(lambda: self._onLocatorResolved(url, status, total, generation)))
+
+    def _onLocatorResolved(self, url, status, total, generation):
+        if generation != self.locator_generation or url in self.locator_status:
+            return
+        self.locator_status[url] = status
+        if status.online:
+            self.locators_online += 1
+        online = self.locators_online
+        checked = len(self.locator_status)
+        self.statusBar().showMessage(
+            f"Media locators: {online} online, {checked - online} offline, {total - checked} pending")
+        self.tree.viewport().update()
+
+    def _onBackgroundError(self, error):
+        self.statusBar().clearMessage()
+        QtWidgets.QMessageBox.warning(self, "Error", f"Background task failed:\n{str(error)}")
+
+    def _badgeIcon(self, color):
+        icon = self.badge_icons.get(color)
+        if icon is None:
+            pixmap = QtGui.QPixmap(12, 12)
+            pixmap.fill(QtCore.Qt.transparent)
+            painter = QtGui.QPainter(pixmap)
+            painter.setRenderHint(QtGui.QPainter.Antialiasing)
+            painter.setBrush(QtGui.QColor(color))
+            painter.setPen(QtCore.Qt.NoPen)
+            painter.drawEllipse(1, 1, 10, 10)
+            painter.end()
+            icon = QtGui.QIcon(pixmap)
+            self.badge_icons[color] = icon
+        return icon
+
+    def _mediaBadge(self, item):
+        """Online/offline badge for NetworkLocators and the source mobs holding them"""
+        if not self.locator_status:
+            return None
+        import media_resolver
+
+        url = media_resolver.locator_url(item.item)
+        if url is not None:
+            status = self.locator_status.get(url)
+            if status is None:
+                return None
+            return (self._badgeIcon("#3cb043" if status.online else "#d0312d"), status.describe())
+
+        urn = media_resolver.source_mob_urn(item.item)
+        if urn is None or urn not in self.mob_locators:
+            return None
+        statuses = [self.locator_status.get(url) for url in self.mob_locators[urn]]
+        if None in statuses:
+            return None
+        online = [s for s in statuses if s.online]
+        tooltip = "\n".join(s.describe() for s in statuses)
+        if len(online) == len(statuses):
+            return (self._badgeIcon("#3cb043"), tooltip)
+        if online:
+            return (self._badgeIcon("#e8a33d"), tooltip)
+        return (self._badgeIcon("#d0312d"), tooltip)
+
+    def scanEmbeddedEssence(self):
+        """Hash every EssenceData stream on the reader pool, resuming an interrupted scan"""
+        if self.reader_pool is None:
+            return
+        import essence_scan
+
+        algorithms = essence_scan.available_algorithms()
+        algorithm, ok = QtWidgets.QInputDialog.getItem(
+            self, "Scan Embedded Essence", "Checksum algorithm:", algorithms, 0, False)
+        if not ok:
+            return
+
+        # Optional, cancelling the dialog scans without comparing checksums
+        sidecar, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Sidecar Checksums (optional)", "", "Checksum Files (*.md5 *.sha1 *.sha256 *.xxh64 *.txt);;All Files (*)")
+        try:
+            checksums = essence_scan.load_sidecar(sidecar) if sidecar else {}
+            state = essence_scan.ScanState(self.current_file, algorithm)
+        except (IOError, OSError) as e:
+            QtWidgets.QMessageBox.warning(self, "Error", f"Cannot start essence scan:\n{str(e)}")
+            return
+
+        self._flushEssenceState()
+        self.essence_results = {}
+        self.essence_problems = 0
+        self.essence_state = state
+        self.essence_generation += 1
+        generation = self.essence_generation
+        self.statusBar().showMessage("Collecting embedded essence...")
+        self.reader_pool.submit(
+            essence_scan.enumerate_streams,
+            callback=lambda streams: self._onEssenceEnumerated(streams, algorithm, checksums, state, generation),
+            errback=self._onBackgroundError)
+
+    def _onEssenceEnumerated(self, streams, algorithm, checksums, state, generation):
+        if generation != self.essence_generation:
+            return
+        import essence_scan
+
+        if not streams:
+            self.statusBar().showMessage("No embedded essence found")
+            return
+
+        total = len(streams)
+        for info in streams:
+            if info.urn in state.done:
+                read_size, digest = state.done[info.urn]
+                self._onEssenceHashed(essence_scan.StreamResult(
+                    info, read_size, digest, essence_scan.sidecar_digest(checksums, info)), total, generation)
+                continue
+
+            def hashed(value, info=info):
+                urn, read_size, digest = value
+                state.record(urn, read_size, digest)
+                self._onEssenceHashed(essence_scan.StreamResult(
+                    info, read_size, digest, essence_scan.sidecar_digest(checksums, info)), total, generation)
+
+            def failed(error, info=info):
+                self._onEssenceHashed(essence_scan.StreamResult(info, error=str(error)), total, generation)
+
+            self.reader_pool.submit(essence_scan.hash_stream, info.urn, algorithm, callback=hashed, errback=failed)
+
+    def _onEssenceHashed(self, result, total, generation):
+        if generation != self.essence_generation or result.info.urn in self.essence_results:
+            return
+        self.essence_results[result.info.urn] = result
+        if not result.ok:
+            self.essence_problems += 1
+        done = len(self.essence_results)
+        problems = self.essence_problems
+        self.statusBar().showMessage(
+            f"Embedded essence: {done - problems} ok, {problems} problems, {total - done} pending")
+        self.tree.viewport().update()
+
+        if done < total:
+            return
+        warning = self._flushEssenceState()
+        if problems:
+            failed = [r for r in self.essence_results.values() if not r.ok]
+            details = "\n\n".join(r.describe() for r in failed[:20])
+            QtWidgets.QMessageBox.warning(
+                self, "Embedded Essence", f"{problems} of {total} streams failed the scan:\n\n{details}")
+        if warning:
+            QtWidgets.QMessageBox.warning(self, "Embedded Essence", warning)
+
+    def _flushEssenceState(self):
+        """Save the streams hashed so far, return the ScanState warning if resume is off"""
+        state = self.essence_state
+        if state is None:
+            return None
+        state.flush()
+        return state.warning
+
+    def _essenceBadge(self, item):
+        """Scan result badge for EssenceData objects and the source mobs owning them"""
+        if not self.essence_results:
+            return None
+        import aaf2
+
+        obj = item.item
+        if isinstance(obj, aaf2.essence.EssenceData):
+            urn = obj.mob_id.urn
+        elif isinstance(obj, aaf2.mobs.SourceMob):
+            urn = obj.mob_id.urn
+        else:
+            return None
+        result = self.essence_results.get(urn)
+        if result is None:
+            return None
+        return (self._badgeIcon("#3cb043" if result.ok else "#d0312d"), result.describe())
+
+    def closeEvent(self, event):
+        """Stop background readers before the window goes away"""
+        if self.reader_pool is not None:
+            self.reader_pool.close()
+            self.reader_pool = None
+        if self.media_resolver is not None:
+            self.media_resolver.close()
+            self.media_resolver = None
+        self._flushEssenceState()
+        if self.classdef_cache_loaded:
+            import classdef_cache
+            try:
+                classdef_cache.save()
+            except (IOError, OSError):
+                pass
+        super(AAFViewer, self).closeEvent(event)
+
     def resizeEvent(self, event):
         """Recalculate column widths when window size changes"""
         super(AAFViewer, self).resizeEvent(event)
+        self.resize_timer.start()
+
+    def _onResizeSettled(self):
         if hasattr(self, 'tree') and self.tree.model():
             total_width = self.tree.viewport().width()
             self.distribute_width(total_width)
@@ -413,6 +898,9 @@ class AAFViewer(QtWidgets.QMainWindow):
             
         # If no results yet, collect them
         if not self.search_results:
+            # Queries run in the background and deliver their own results
+            if self.search_type == "Query":
+                return
             root_index = model.index(0, 0)
             self._collectSearchResults(root_index)
             
@@ -439,6 +927,9 @@ class AAFViewer(QtWidgets.QMainWindow):
             
         # If no results yet, collect them
         if not self.search_results:
+            # Queries run in the background and deliver their own results
+            if self.search_type == "Query":
+                return
             root_index = model.index(0, 0)
             self._collectSearchResults(root_index)
             
@@ -508,8 +999,15 @@ class AAFViewer(QtWidgets.QMainWindow):
         index = self.search_results[self.current_search_index]
         
         # Select and scroll to the item
-        self.tree.setCurrentIndex(index)
-        self.tree.scrollTo(index)
+        if isinstance(index, tuple):
+            # Query result, only the path to it is loaded into the tree
+            urn, steps = index[:2]
+            positions = self.mob_index.findMobID(urn) if self.mob_index else []
+            if positions:
+                self.goToMob(self.mob_index.mobs[positions[0]], steps)
+        else:
+            self.tree.setCurrentIndex(index)
+            self.tree.scrollTo(index)
         
         # Update match counter
         self.updateMatchCounter()
@@ -530,8 +1028,11 @@ class AAFViewer(QtWidgets.QMainWindow):
         self.current_search_index = -1
         self.search_results = []
         self.match_counter.setText("0/0")
-        
-        if text:
+        self.query_generation += 1
+
+        if text and self.search_type == "Query":
+            self._runQuery()
+        elif text:
             # Get current model
             model = self.tree.model()
             if model:
@@ -549,8 +1050,16 @@ class AAFViewer(QtWidgets.QMainWindow):
         self.current_search_index = -1
         self.search_results = []
         self.match_counter.setText("0/0")
-        
-        if self.search_text:
+        self.query_generation += 1
+
+        if search_type == "Query":
+            self.search_box.setPlaceholderText('class:SourceClip and length>1000 and mob.name~"A001"')
+        else:
+            self.search_box.setPlaceholderText("Search...")
+
+        if self.search_text and search_type == "Query":
+            self._runQuery()
+        elif self.search_text:
             # Get current model
             model = self.tree.model()
             if model:
@@ -562,6 +1071,35 @@ class AAFViewer(QtWidgets.QMainWindow):
                     self.current_search_index = 0
                     self._selectSearchResult()
 
+    def _runQuery(self):
+        """Run the search text as a structured query on a worker, see aaf_query"""
+        if self.reader_pool is None:
+            return
+        import aaf_query
+
+        # Report syntax errors right away instead of from the worker
+        try:
+            aaf_query.Query(self.search_text)
+        except aaf_query.QueryError as e:
+            QtWidgets.QMessageBox.warning(self, "Query", f"Invalid query:\n{str(e)}")
+            return
+
+        generation = self.query_generation
+        self.match_counter.setText("...")
+        self.reader_pool.submit(aaf_query.run_query, self.search_text,
+                                callback=lambda results: self._onQueryFinished(results, generation),
+                                errback=self._onBackgroundError)
+
+    def _onQueryFinished(self, results, generation):
+        if generation != self.query_generation:
+            return
+        self.search_results = results
+        if results:
+            self.current_search_index = 0
+            self._selectSearchResult()
+        else:
+            self.updateMatchCounter()
+
 if __name__ == "__main__":
 
     QtWidgets.QApplication.setAttribute(QtCore.Qt.AA_EnableHighDpiScaling)
@@ -573,10 +1111,11 @@ if __name__ == "__main__":
         viewer = AAFViewer()
         viewer.show()
 
-        # Process CLI arguments and automatically open a file path if one is provided
+        # Process CLI arguments and automatically open a file path if one is provided,
+        # once the event loop has put the window on screen
         if len(sys.argv) > 1 and sys.argv[1].endswith('.aaf'):
             viewer.current_file = sys.argv[1]
-            viewer.loadAAFFile()
+            QtCore.QTimer.singleShot(0, viewer.loadAAFFile)
             
         sys.exit(app.exec_())
     except Exception as e:
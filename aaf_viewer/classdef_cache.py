@@ -0,0 +1,153 @@
+# Class definition cache shared by every open file.
+# Decoded class names, inheritance chains and property layouts are keyed by class AUID,
+# which identifies the same class in every AAF, so files written by the same application
+# resolve their classes once per session (or once ever with the on-disk cache).
+
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+)
+import user_files
+
+# Bump when the on-disk layout changes, caches written with another version are ignored
+FORMAT_VERSION = 1
+
+# Class AUID -> ClassInfo. Plain dict reads and writes, so worker threads may share it:
+# two threads building the same entry store equal values.
+_classes = {}
+
+class ClassInfo(object):
+    __slots__ = ('auid', 'name', 'chain', 'properties', 'names')
+
+    def __init__(self, auid, name, chain, properties=None):
+        self.auid = auid
+        self.name = name
+        self.chain = chain  # Class names from this class up to InterchangeObject
+        self.properties = properties  # Property AUID string -> (name, type name, optional), built on demand
+        self.names = None  # Lowercase property name -> property name or None, see property_name()
+
+def default_path():
+    return user_files.user_path("classdef_cache.json")
+
+def _build(classdef):
+    chain = tuple(c.class_name for c in classdef.relatives())
+    return ClassInfo(classdef.auid, chain[0], chain)
+
+def lookup(obj):
+    """Return the ClassInfo of an AAFObject, or None if its class is not defined"""
+    class_id = getattr(obj, 'class_id', None)
+    if class_id is not None:
+        info = _classes.get(class_id)
+        if info is not None:
+            return info
+
+    classdef = obj.classdef
+    if classdef is None:
+        return None
+
+    info = _build(classdef)
+    # Objects created in memory may have no class_id, only cache what can be found again
+    if class_id is not None:
+        _classes[class_id] = info
+    return info
+
+def class_name(obj):
+    info = lookup(obj)
+    if info is None:
+        return obj.__class__.__name__
+    return info.name
+
+def class_chain(obj):
+    info = lookup(obj)
+    if info is None:
+        return (obj.__class__.__name__,)
+    return info.chain
+
+def property_layout(obj):
+    """
+    Return {property AUID: (name, type name, optional)} for every property the class can hold
+
+    The layout is taken from the first file that asks for it, extension properties that only
+    another file defines are not merged in.
+    """
+    info = lookup(obj)
+    if info is None:
+        return {}
+
+    if info.properties is None:
+        properties = {}
+        for p in obj.classdef.all_propertydefs():
+            properties[str(p.auid)] = _layout_entry(p)
+        info.properties = properties
+    return info.properties
+
+def _layout_entry(propertydef):
+    typedef = propertydef.typedef
+    return (propertydef.property_name, typedef.type_name if typedef else None, propertydef.optional)
+
+def property_name(obj, name):
+    """
+    Return the name obj's class uses for property name in any letter case, None if it has none
+
+    Answers come from the cached layout, so repeated lookups never scan property definitions.
+    A name missing from a layout that came from another file is checked against this file's
+    definition once per session.
+    """
+    info = lookup(obj)
+    if info is None:
+        return None
+    if info.names is None:
+        info.names = dict((entry[0].lower(), entry[0]) for entry in property_layout(obj).values())
+
+    lower = name.lower()
+    if lower not in info.names:
+        found = None
+        classdef = obj.classdef
+        if classdef is not None:
+            for p in classdef.all_propertydefs():
+                if p.property_name.lower() == lower:
+                    found = p.property_name
+                    info.properties[str(p.auid)] = _layout_entry(p)
+                    break
+        info.names[lower] = found
+    return info.names[lower]
+
+def clear():
+    _classes.clear()
+
+def load(path=None):
+    """Merge a cache written by save(), missing or unreadable files are ignored"""
+    # aaf2 is only imported here, so importing this module at startup stays cheap
+    from aaf2.auid import AUID
+
+    data = user_files.read_json(path or default_path())
+    if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+        return 0
+
+    count = 0
+    for key, entry in data.get("classes", {}).items():
+        try:
+            auid = AUID(key)
+        except Exception:
+            continue
+        if auid in _classes:
+            continue
+        properties = entry.get("properties")
+        if properties is not None:
+            properties = dict((k, tuple(v)) for k, v in properties.items())
+        _classes[auid] = ClassInfo(auid, entry["name"], tuple(entry["chain"]), properties)
+        count += 1
+    return count
+
+def save(path=None):
+    """Write every cached class to path, replacing the previous file atomically"""
+    path = path or default_path()
+    data = {"version": FORMAT_VERSION, "classes": {}}
+    for auid, info in list(_classes.items()):
+        entry = {"name": info.name, "chain": list(info.chain)}
+        if info.properties is not None:
+            entry["properties"] = dict((k, list(v)) for k, v in info.properties.items())
+        data["classes"][str(auid)] = entry
+    user_files.write_json(path, data)
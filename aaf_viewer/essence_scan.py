@@ -0,0 +1,347 @@
+"""
+Integrity scan of the essence embedded in an AAF
+
+Every EssenceData stream is hashed in fixed size chunks on AAFReaderPool workers, one
+stream per worker, so memory stays bounded by workers x chunk size however large the file.
+Stream lengths are compared with what the source mob's descriptor implies (PCM audio only,
+other codecs just report their lengths) and digests with an optional sidecar checksum file
+in md5sum/sha256sum format, keyed by mob name, MobID urn or material number.
+
+Finished streams are recorded in a state file next to the AAF (under ~/.aaf_viewer when its
+folder is read-only), so an interrupted scan resumes with the streams that are left. A stream that was being hashed starts over.
+
+Usage: python essence_scan.py file.aaf [-a md5|sha1|sha256|xxh64|xxh3_64] [-s sums.md5] [-w 4]
+"""
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+)
+import os
+import sys
+import time
+import hashlib
+
+import aaf2
+from aaf2.mobid import MobID
+import classdef_cache
+import user_files
+from aaf_access import AAFReaderPool, Cancelled, cancelled
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+CHUNK_SIZE = 4 * 1024 * 1024
+
+def available_algorithms():
+    algorithms = ["md5", "sha1", "sha256"]
+    if xxhash is not None:
+        algorithms += ["xxh64", "xxh3_64"]
+    return algorithms
+
+def new_hash(algorithm):
+    if algorithm.startswith("xxh"):
+        if xxhash is None:
+            raise ValueError("%s needs the xxhash module" % algorithm)
+        return getattr(xxhash, algorithm)()
+    return hashlib.new(algorithm)
+
+class StreamInfo(object):
+    """Plain description of one EssenceData stream, safe to pass between workers"""
+    __slots__ = ('urn', 'name', 'byte_size', 'descriptor', 'length', 'expected_size')
+
+    def __init__(self, urn, name, byte_size, descriptor, length, expected_size):
+        self.urn = urn
+        self.name = name
+        self.byte_size = byte_size
+        self.descriptor = descriptor
+        self.length = length  # Descriptor Length in edit units
+        self.expected_size = expected_size  # Bytes implied by the descriptor, None if unknown
+
+def _expected_size(descriptor):
+    """Essence bytes implied by a PCM descriptor, None for anything else"""
+    if descriptor is None or classdef_cache.class_name(descriptor) != 'PCMDescriptor':
+        return None
+    length = descriptor.get('Length')
+    block_align = descriptor.get('BlockAlign')
+    if length is None or block_align is None or length.value is None or not block_align.value:
+        return None
+    return length.value * block_align.value
+
+def enumerate_streams(aaf_file):
+    """Return a StreamInfo for every embedded essence stream"""
+    streams = []
+    essencedata = aaf_file.content.get('EssenceData')
+    if essencedata is None:
+        return streams
+
+    for essence in essencedata:
+        mob_id = essence.mob_id
+        mob = essence.mob
+        descriptor = mob.descriptor if isinstance(mob, aaf2.mobs.SourceMob) else None
+        length = descriptor.get('Length') if descriptor is not None else None
+
+        stream = essence.open('r')
+        byte_size = stream.dir.byte_size
+
+        streams.append(StreamInfo(
+            mob_id.urn,
+            mob.name if mob is not None else None,
+            byte_size,
+            classdef_cache.class_name(descriptor) if descriptor is not None else None,
+            length.value if length is not None else None,
+            _expected_size(descriptor)))
+    return streams
+
+def hash_stream(aaf_file, urn, algorithm, chunk_size=CHUNK_SIZE):
+    """Return (urn, bytes read, hex digest) for the stream of the mob urn"""
+    essence = aaf_file.content.essencedata.get(MobID(urn))
+    stream = essence.open('r')
+    digest = new_hash(algorithm)
+    total = 0
+    while True:
+        if cancelled():
+            raise Cancelled(urn)
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        total += len(chunk)
+    return urn, total, digest.hexdigest()
+
+def load_sidecar(path):
+    """Read an md5sum/sha256sum style file into {lowercase key: lowercase hex digest}"""
+    checksums = {}
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(None, 1)
+            if len(parts) != 2:
+                continue
+            digest, name = parts
+            # "digest *name" marks binary mode in md5sum output
+            name = name.lstrip("*").strip()
+            checksums[name.lower()] = digest.lower()
+            checksums[os.path.splitext(os.path.basename(name))[0].lower()] = digest.lower()
+    return checksums
+
+def sidecar_digest(checksums, info):
+    """Digest for a stream from sidecar checksums, matched by urn, material number or mob name"""
+    if not checksums:
+        return None
+    urn = info.urn.lower()
+    material = urn.replace("urn:smpte:umid:", "").replace(".", "")[32:]
+    for key in (urn, material, (info.name or "").lower()):
+        if key and key in checksums:
+            return checksums[key]
+    return None
+
+class StreamResult(object):
+    __slots__ = ('info', 'read_size', 'digest', 'expected_digest', 'status', 'error')
+
+    def __init__(self, info, read_size=None, digest=None, expected_digest=None, error=None):
+        self.info = info
+        self.read_size = read_size
+        self.digest = digest
+        self.expected_digest = expected_digest
+        self.error = error
+        self.status = self._status()
+
+    def _status(self):
+        if self.error:
+            return "error"
+        if self.read_size != self.info.byte_size:
+            return "short read"
+        if self.info.expected_size is not None and self.info.expected_size != self.info.byte_size:
+            return "size mismatch"
+        if self.expected_digest is not None and self.expected_digest != self.digest:
+            return "checksum mismatch"
+        return "ok"
+
+    @property
+    def ok(self):
+        return self.status == "ok"
+
+    def describe(self):
+        info = self.info
+        lines = ["%s: %s" % (info.name or info.urn, self.status),
+                 "%d bytes in stream" % info.byte_size]
+        if info.expected_size is not None:
+            lines.append("%d bytes expected from %s Length %s" % (info.expected_size, info.descriptor, info.length))
+        elif info.length is not None:
+            lines.append("%s Length %s" % (info.descriptor, info.length))
+        if self.digest:
+            lines.append("digest %s" % self.digest)
+        if self.expected_digest:
+            lines.append("sidecar %s" % self.expected_digest)
+        if self.error:
+            lines.append(self.error)
+        return "\n".join(lines)
+
+def fallback_state_path(aaf_path):
+    """State file under ~/.aaf_viewer for an AAF whose folder cannot be written"""
+    key = hashlib.sha1(os.path.abspath(aaf_path).encode('utf-8')).hexdigest()
+    return user_files.user_path(os.path.join("scan_state", key + ".json"))
+
+class ScanState(object):
+    """
+    Digests of finished streams, saved every few seconds so a scan can resume
+
+    The state lives next to the AAF, or under ~/.aaf_viewer when that folder is read-only
+    as delivery volumes often are. If neither can be written resume is turned off and
+    warning says why, the scan itself carries on.
+    """
+
+    SAVE_INTERVAL = 2.0  # Seconds between writes, the whole file is rewritten each time
+
+    def __init__(self, aaf_path, algorithm, path=None):
+        self.algorithm = algorithm
+        st = os.stat(aaf_path)
+        # A rewritten AAF invalidates everything recorded for it
+        self.identity = [st.st_size, int(st.st_mtime)]
+        self.done = {}
+        self.dirty = False
+        self.saved = time.time()
+        self.warning = None
+
+        if path:
+            self.paths = [path]
+        else:
+            beside = aaf_path + ".integrity.json"
+            fallback = fallback_state_path(aaf_path)
+            writable = os.access(os.path.dirname(os.path.abspath(aaf_path)), os.W_OK)
+            self.paths = [beside, fallback] if writable else [fallback, beside]
+        self.path = self.paths[0]
+        self._load()
+
+    def _load(self):
+        for path in self.paths:
+            data = user_files.read_json(path)
+            if not isinstance(data, dict):
+                continue
+            if data.get("identity") == self.identity and data.get("algorithm") == self.algorithm:
+                self.done = data.get("streams", {})
+                return
+
+    def record(self, urn, read_size, digest):
+        self.done[urn] = [read_size, digest]
+        self.dirty = True
+        if time.time() - self.saved >= self.SAVE_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Write pending results, trying the fallback location before giving up on resume"""
+        if not self.dirty or self.path is None:
+            return
+        data = {"identity": self.identity, "algorithm": self.algorithm, "streams": self.done}
+        while self.path is not None:
+            try:
+                user_files.write_json(self.path, data)
+                break
+            except (IOError, OSError) as e:
+                error = e
+                remaining = self.paths[self.paths.index(self.path) + 1:]
+                self.path = remaining[0] if remaining else None
+        if self.path is None:
+            self.warning = "Resume state cannot be saved, an interrupted scan starts over: %s" % error
+        self.dirty = False
+        self.saved = time.time()
+
+    def clear(self):
+        self.done = {}
+        self.dirty = False
+        for path in self.paths:
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+def scan(pool, state, sidecar=None, callback=None):
+    """
+    Hash every stream of the file open in pool with state.algorithm and return [StreamResult]
+
+    Streams recorded in the ScanState are not read again. callback(result) is called on
+    the calling thread as each stream finishes.
+    """
+    algorithm = state.algorithm
+    checksums = load_sidecar(sidecar) if sidecar else {}
+    streams = pool.submit(enumerate_streams).result()
+
+    results = []
+    jobs = []
+    for info in streams:
+        if info.urn in state.done:
+            read_size, digest = state.done[info.urn]
+            result = StreamResult(info, read_size, digest, sidecar_digest(checksums, info))
+            results.append(result)
+            if callback:
+                callback(result)
+        else:
+            jobs.append((info, pool.submit(hash_stream, info.urn, algorithm)))
+
+    try:
+        for info, job in jobs:
+            try:
+                urn, read_size, digest = job.result()
+            except Exception as e:
+                result = StreamResult(info, error=str(e))
+            else:
+                state.record(urn, read_size, digest)
+                result = StreamResult(info, read_size, digest, sidecar_digest(checksums, info))
+            results.append(result)
+            if callback:
+                callback(result)
+    finally:
+        # Also on Ctrl+C, so the streams hashed so far are kept
+        state.flush()
+    return results
+
+def main():
+    from optparse import OptionParser
+
+    parser = OptionParser(usage="%prog [options] file.aaf")
+    parser.add_option('-a', '--algorithm', default="md5", help=", ".join(available_algorithms()))
+    parser.add_option('-s', '--sidecar', default=None, help="md5sum/sha256sum style checksum file")
+    parser.add_option('--state', default=None, help="resume state file, default file.aaf.integrity.json")
+    parser.add_option('--restart', action="store_true", default=False, help="ignore earlier progress")
+    parser.add_option('-w', '--workers', type="int", default=None)
+    parser.add_option('-p', '--processes', action="store_true", default=False)
+    (options, args) = parser.parse_args()
+    if not args:
+        parser.error("not enough arguments")
+    if options.algorithm not in available_algorithms():
+        parser.error("unknown algorithm %s" % options.algorithm)
+
+    path = args[0]
+    state = ScanState(path, options.algorithm, options.state)
+    if options.restart:
+        state.clear()
+
+    def report(result):
+        print("%-18s %12d  %s  %s" % (result.status, result.info.byte_size, result.digest or "-",
+                                      result.info.name or result.info.urn))
+
+    pool = AAFReaderPool(path, max_workers=options.workers, processes=options.processes)
+    start = time.perf_counter()
+    try:
+        results = scan(pool, state, options.sidecar, report)
+    finally:
+        pool.close()
+        if state.warning:
+            print(state.warning, file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    total = sum(result.read_size or 0 for result in results)
+    failed = [result for result in results if not result.ok]
+    print("%d streams, %.1f MB in %.2fs (%.1f MB/s), %d problems" % (
+        len(results), total / 1e6, elapsed, total / 1e6 / elapsed if elapsed else 0.0, len(failed)))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
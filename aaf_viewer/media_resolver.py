@@ -0,0 +1,232 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+)
+import os
+import re
+import sys
+import time
+import threading
+from concurrent import futures
+
+from urllib.parse import unquote, urlsplit
+
+import aaf2
+import classdef_cache
+import user_files
+
+_DRIVE = re.compile(r'^/?([A-Za-z])[:|][/\\]?')
+_DRIVE_HOST = re.compile(r'^[A-Za-z][:|]$')
+
+class LocatorStatus(object):
+    __slots__ = ('path', 'online', 'size', 'mtime', 'error', 'checked')
+
+    def __init__(self, path, online, size=None, mtime=None, error=None, checked=None):
+        self.path = path
+        self.online = online
+        self.size = size
+        self.mtime = mtime
+        self.error = error
+        self.checked = checked
+
+    def describe(self):
+        if self.online:
+            return "Online: %s (%d bytes, modified %s)" % (
+                self.path, self.size, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.mtime)))
+        return "Offline: %s (%s)" % (self.path, self.error or "not found")
+
+def locator_url(obj):
+    """URL held by a NetworkLocator or by its URLString property, otherwise None"""
+    if isinstance(obj, aaf2.properties.Property):
+        if obj.name != 'URLString':
+            return None
+        obj = obj.parent
+    if not isinstance(obj, aaf2.core.AAFObject) or classdef_cache.class_name(obj) != 'NetworkLocator':
+        return None
+    url = obj.get('URLString')
+    return url.value if url is not None else None
+
+def source_mob_urn(obj):
+    """MobID urn of a SourceMob, otherwise None"""
+    if isinstance(obj, aaf2.mobs.SourceMob):
+        return obj.mob_id.urn
+    return None
+
+def _descriptors(descriptor):
+    yield descriptor
+    sub_descriptors = descriptor.get('FileDescriptors')
+    if sub_descriptors is not None:
+        for sub_descriptor in sub_descriptors:
+            for d in _descriptors(sub_descriptor):
+                yield d
+
+def collect_locators(aaf_file):
+    """
+    Return [(source mob urn, url)] for every NetworkLocator in one pass over the source mobs
+
+    Plain data only, so it can run on an AAFReaderPool worker.
+    """
+    result = []
+    for mob in aaf_file.content.sourcemobs():
+        descriptor = mob.descriptor
+        if descriptor is None:
+            continue
+        urn = mob.mob_id.urn
+        for d in _descriptors(descriptor):
+            locators = d.get('Locator')
+            if locators is None:
+                continue
+            for locator in locators:
+                url = locator_url(locator)
+                if url:
+                    result.append((urn, url))
+    return result
+
+def normalize_path(url, path_maps=None):
+    """
+    Turn a locator URL written on any platform into a local path
+
+    Handles file:// URLs with or without host, percent escapes, drive letters and UNC paths.
+    path_maps is a list of (prefix, replacement) applied in order to the forward slash form,
+    e.g. ("C:/Media", "/mnt/media") or ("/Volumes/Media", "//nas/media").
+    """
+    path = url.strip()
+    if path.lower().startswith("file:"):
+        parts = urlsplit(path)
+        path = unquote(parts.path)
+        host = parts.netloc
+        if _DRIVE_HOST.match(host):
+            # file://C:/dir names a drive, not a server
+            path = host[0] + ":" + path
+        elif host and host.lower() != "localhost":
+            # file://server/share/... is a UNC path
+            path = "//" + host + path
+    path = path.replace("\\", "/")
+
+    # /C:/dir from file:///C:/dir
+    match = _DRIVE.match(path)
+    if match:
+        path = match.group(1).upper() + ":/" + path[match.end():]
+
+    for prefix, replacement in path_maps or []:
+        prefix = prefix.replace("\\", "/")
+        if path.lower().startswith(prefix.lower()):
+            path = replacement.replace("\\", "/") + path[len(prefix):]
+            break
+
+    if sys.platform == 'win32':
+        return path.replace("/", "\\")
+    return path
+
+def default_path_maps_file():
+    return user_files.user_path("path_maps.json")
+
+def load_path_maps(path=None):
+    """Return [(prefix, replacement)] written by save_path_maps, missing or unreadable files give []"""
+    data = user_files.read_json(path or default_path_maps_file())
+    if not isinstance(data, dict):
+        return []
+    return [(prefix, replacement) for prefix, replacement in data.get("path_maps", [])]
+
+def save_path_maps(path_maps, path=None):
+    user_files.write_json(path or default_path_maps_file(),
+                          {"path_maps": [list(m) for m in path_maps]}, indent=2)
+
+def format_path_maps(path_maps):
+    return "\n".join("%s = %s" % m for m in path_maps)
+
+def parse_path_maps(text):
+    """Read one "prefix = replacement" mapping per line, e.g. C:/Media = /mnt/media"""
+    path_maps = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        prefix, sep, replacement = line.partition("=")
+        if not sep or not prefix.strip() or not replacement.strip():
+            raise ValueError("Expected prefix = replacement: %s" % line)
+        path_maps.append((prefix.strip(), replacement.strip()))
+    return path_maps
+
+class LocatorResolver(object):
+    """
+    Checks locator paths concurrently, caching each result for ttl seconds
+
+    Existence checks are stat calls that mostly wait on the filesystem, so a wide thread
+    pool keeps that many requests in flight on slow network mounts.
+    """
+
+    def __init__(self, max_workers=32, ttl=60.0, path_maps=None):
+        self.ttl = ttl
+        self.path_maps = path_maps or []
+        self.cache = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.executor = futures.ThreadPoolExecutor(max_workers, thread_name_prefix="aaf-locator")
+
+    def check(self, path):
+        """stat path now, bypassing the cache"""
+        try:
+            st = os.stat(path)
+        except (IOError, OSError) as e:
+            return LocatorStatus(path, False, error=e.strerror or str(e), checked=time.time())
+        return LocatorStatus(path, True, st.st_size, st.st_mtime, checked=time.time())
+
+    def _check(self, path):
+        status = self.check(path)
+        with self.lock:
+            self.cache[path] = status
+            self.pending.pop(path, None)
+        return status
+
+    def submit(self, path):
+        """Return a future for the status of path, sharing cached results and checks in flight"""
+        with self.lock:
+            status = self.cache.get(path)
+            if status is not None and time.time() - status.checked < self.ttl:
+                future = futures.Future()
+                future.set_result(status)
+                return future
+            future = self.pending.get(path)
+            if future is None:
+                future = self.executor.submit(self._check, path)
+                self.pending[path] = future
+            return future
+
+    def _byPath(self, urls):
+        """Group urls by local path so every file is only checked once"""
+        by_path = {}
+        for url in urls:
+            by_path.setdefault(normalize_path(url, self.path_maps), []).append(url)
+        return by_path
+
+    def resolve(self, urls):
+        """Check every url and return {url: LocatorStatus}"""
+        by_path = self._byPath(urls)
+        jobs = dict((self.submit(path), path) for path in by_path)
+        results = {}
+        for future in futures.as_completed(jobs):
+            status = future.result()
+            for url in by_path[jobs[future]]:
+                results[url] = status
+        return results
+
+    def resolveAsync(self, urls, callback):
+        """Check every url without blocking, callback(url, status) is called from the worker threads"""
+        by_path = self._byPath(urls)
+
+        def done(future, urls):
+            if future.cancelled() or future.exception() is not None:
+                return
+            status = future.result()
+            for url in urls:
+                callback(url, status)
+
+        for path, path_urls in by_path.items():
+            self.submit(path).add_done_callback(lambda future, path_urls=path_urls: done(future, path_urls))
+        return len(by_path)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,171 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+)
+import bisect
+
+import classdef_cache
+
+# Fields offered by the "Go to Mob" tool
+INDEX_FIELDS = [
+    "Any",
+    "MobID",
+    "Name",
+    "Usage",
+    "Type"
+]
+
+def normalize_mob_id(text):
+    """Reduce a MobID/UMID string to bare lowercase hex so urn, dotted and dashed forms all match"""
+    s = str(text).strip().lower()
+    for token in ("urn:smpte:umid:", ".", "-", "0x", " "):
+        s = s.replace(token, "")
+    return s
+
+def _trigrams(text):
+    return set(text[i:i + 3] for i in range(len(text) - 2))
+
+class MobIndex(object):
+    """
+    Hash indexes over content.mobs, built once when a file is opened
+
+    Every lookup returns mobs in index order and never touches the AAF file again,
+    so answering a query costs a few dict hits regardless of the number of mobs.
+    """
+
+    def __init__(self, mobs):
+        self.mobs = []
+        self.names = []
+        self.by_id = {}
+        self.by_material = {}
+        self.by_name = {}
+        self.by_usage = {}
+        self.by_type = {}
+        self.by_trigram = {}
+        self.sorted_names = []
+
+        for mob in mobs:
+            self.add(mob)
+
+        self.sorted_names = sorted((name, pos) for name, positions in self.by_name.items()
+                                   for pos in positions)
+
+    def __len__(self):
+        return len(self.mobs)
+
+    def add(self, mob):
+        """Index a single mob, sorted_names is rebuilt by the caller"""
+        pos = len(self.mobs)
+        self.mobs.append(mob)
+
+        mob_id = mob.mob_id
+        key = normalize_mob_id(mob_id.urn)
+        self.by_id[key] = pos
+        # The trailing half of a UMID is the material number, which is what most tools print
+        self.by_material.setdefault(key[32:], []).append(pos)
+
+        name = (mob.name or "").lower()
+        self.names.append(name)
+        self.by_name.setdefault(name, []).append(pos)
+        for gram in _trigrams(name):
+            self.by_trigram.setdefault(gram, []).append(pos)
+
+        usage = self._usage(mob)
+        if usage:
+            self.by_usage.setdefault(usage, []).append(pos)
+
+        self.by_type.setdefault(classdef_cache.class_name(mob).lower(), []).append(pos)
+
+    def _usage(self, mob):
+        try:
+            usage = mob.usage
+        except Exception:
+            return None
+        if not usage:
+            return None
+        usage = str(usage).lower()
+        if usage.startswith("usage_"):
+            usage = usage[len("usage_"):]
+        return usage
+
+    def lookup(self, text, field="Any", limit=200):
+        """Return up to limit mobs matching text in the given field"""
+        text = text.strip()
+        if not text:
+            return []
+
+        if field == "MobID":
+            positions = self.findMobID(text, limit)
+        elif field == "Name":
+            positions = self.findName(text, limit)
+        elif field == "Usage":
+            positions = self.findUsage(text, limit)
+        elif field == "Type":
+            positions = self.findType(text, limit)
+        else:
+            positions = []
+            seen = set()
+            for find in (self.findMobID, self.findName, self.findUsage, self.findType):
+                for pos in find(text, limit):
+                    if pos not in seen:
+                        seen.add(pos)
+                        positions.append(pos)
+                if len(positions) >= limit:
+                    break
+
+        return [self.mobs[pos] for pos in positions[:limit]]
+
+    def findMobID(self, text, limit=None):
+        key = normalize_mob_id(text)
+        if key in self.by_id:
+            return [self.by_id[key]]
+        return self.by_material.get(key, [])[:limit]
+
+    def findName(self, text, limit=None):
+        """Exact matches first, then prefix matches, then substring matches"""
+        text = text.lower()
+        result = list(self.by_name.get(text, []))
+        seen = set(result)
+
+        i = bisect.bisect_left(self.sorted_names, (text, -1))
+        while i < len(self.sorted_names) and (limit is None or len(result) < limit):
+            name, pos = self.sorted_names[i]
+            if not name.startswith(text):
+                break
+            i += 1
+            if pos not in seen:
+                seen.add(pos)
+                result.append(pos)
+
+        if len(text) >= 3 and (limit is None or len(result) < limit):
+            # Intersect trigram postings, smallest first, then confirm the candidates
+            postings = [self.by_trigram.get(gram) for gram in _trigrams(text)]
+            if all(postings):
+                postings.sort(key=len)
+                candidates = set(postings[0])
+                for other in postings[1:]:
+                    candidates.intersection_update(other)
+                    if not candidates:
+                        break
+                for pos in sorted(candidates):
+                    if pos not in seen and text in self.names[pos]:
+                        seen.add(pos)
+                        result.append(pos)
+
+        return result
+
+    def findUsage(self, text, limit=None):
+        text = text.lower()
+        if text.startswith("usage_"):
+            text = text[len("usage_"):]
+        return self.by_usage.get(text, [])[:limit]
+
+    def findType(self, text, limit=None):
+        text = text.lower()
+        positions = self.by_type.get(text)
+        if positions is None:
+            # Allow "composition" for "compositionmob"
+            positions = self.by_type.get(text + "mob", [])
+        return positions[:limit]
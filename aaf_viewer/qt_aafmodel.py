@@ -13,123 +13,8 @@ from PySide2 import QtCore
 from PySide2 import QtWidgets
 
 import aaf2
-
-class TreeItem(object):
-
-    def __init__(self, item, parent=None, index = 0):
-        self.parentItem = parent
-        self.item = item
-        self.children = {}
-        self.children_count = 0
-        self.properties = {}
-        self.loaded = False
-        self.index = index
-        self.references = []
-        #self.getData()
-    def columnCount(self):
-        return 1
-
-    def childCount(self):
-        self.setup()
-        return self.children_count
-
-    def child(self,row):
-        self.setup()
-        if row in self.children:
-            return self.children[row]
-
-        if isinstance(self.item, aaf2.properties.StrongRefSetProperty):
-            key = self.references[row]
-            item = self.item.get(key)
-            t = TreeItem(item ,self, row)
-
-        elif isinstance(self.item, aaf2.properties.StrongRefVectorProperty):
-            item = self.item.get(row)
-            t = TreeItem(item ,self, row)
-        else:
-            return None
-        print(row, item)
-        self.children[row] = t
-        return t
-
-    def childNumber(self):
-        self.setup()
-        return self.index
-
-    def parent(self):
-        self.setup()
-        return self.parentItem
-
-    def extend(self, items):
-        for i in items:
-            index = self.children_count
-            t = TreeItem(i,self, index)
-
-            self.children[index] = t
-            self.children_count += 1
-
-    def name(self):
-        item = self.item
-        if hasattr(item, 'name'):
-            name = item.name
-            if name:
-                return name
-        return self.class_name()
-
-    def class_name(self):
-        item = self.item
-        if isinstance(item, aaf2.core.AAFObject):
-            return item.classdef.class_name
-
-        if hasattr(item,"class_name"):
-            return item.class_name
-        else:
-            return item.__class__.__name__
-
-    def setup(self):
-        if self.loaded:
-            return
-
-        item = self.item
-        if isinstance(item, list):
-            self.extend(item)
-
-        if isinstance(item, aaf2.core.AAFObject):
-            self.extend(list(item.properties()))
-
-        elif isinstance(item, aaf2.properties.StrongRefProperty):
-            self.extend([item.value])
-
-        elif isinstance(item, aaf2.properties.StrongRefVectorProperty):
-            self.children_count = len(item)
-
-        elif isinstance(item, aaf2.properties.StrongRefSetProperty):
-            self.children_count = len(item)
-            self.references = list(item.references.keys())
-            self.references.sort()
-
-        elif isinstance(item, (aaf2.properties.Property)):
-            try:
-                v = str(item.value)
-            except:
-                v = "Error"
-
-            self.properties['Value'] = v
-
-        # add slot and mob references as children for convenience
-        if isinstance(item, aaf2.components.SourceClip):
-            mob = item.mob
-            if mob:
-                self.extend([mob])
-            slot = item.slot
-            if slot:
-                self.extend([slot])
-
-
-        self.properties['Name'] = self.name()
-        self.properties['Class'] = self.class_name()
-
-        self.loaded = True
+from aaf_tree import TreeItem
+from view_state import TreeViewState, estimate_column_width
 
 class AAFModel(QtCore.QAbstractItemModel):
 
@@ -140,6 +25,9 @@ class AAFModel(QtCore.QAbstractItemModel):
 
         self.headers = ['Name', 'Value', 'Class']
 
+        # Callables taking a TreeItem and returning (QIcon, tooltip) or None, shown on the Name column
+        self.decorators = []
+
     def headerData(self, column, orientation,role):
         if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
             return self.headers[column]
@@ -159,6 +47,16 @@ class AAFModel(QtCore.QAbstractItemModel):
         if not index.isValid():
             return 0
 
+        if role in (QtCore.Qt.DecorationRole, QtCore.Qt.ToolTipRole):
+            if index.column() != 0 or not self.decorators:
+                return None
+            item = self.getItem(index)
+            for decorator in self.decorators:
+                badge = decorator(item)
+                if badge:
+                    return badge[0] if role == QtCore.Qt.DecorationRole else badge[1]
+            return None
+
         if role != QtCore.Qt.DisplayRole:
             return None
 
@@ -194,6 +92,36 @@ class AAFModel(QtCore.QAbstractItemModel):
             return QtCore.QModelIndex()
 
 
+    def indexForMob(self, mob):
+        """Return the index of mob in this model, only the items on the path to it get created"""
+        index = QtCore.QModelIndex()
+        item = self.rootItem
+        # Root > Header > Content > Mobs is the deepest route to a mob
+        for depth in range(8):
+            row = item.rowForMob(mob)
+            if row is not None:
+                return self.index(row, 0, index)
+
+            row = item.rowTowardsMobs()
+            if row is None:
+                break
+            index = self.index(row, 0, index)
+            item = self.getItem(index)
+        return QtCore.QModelIndex()
+
+    def indexForPath(self, index, steps):
+        """Walk steps down from index, each step is a property name or a row number"""
+        for step in steps:
+            item = self.getItem(index)
+            if isinstance(step, int):
+                row = step
+            else:
+                row = item.rowForProperty(step)
+            if row is None or row >= item.childCount():
+                return QtCore.QModelIndex()
+            index = self.index(row, 0, index)
+        return index
+
     def getItem(self,index):
 
         if index.isValid():
@@ -202,6 +130,21 @@ class AAFModel(QtCore.QAbstractItemModel):
                 return item
         return self.rootItem
 
+class GuiDispatcher(QtCore.QObject):
+    """Runs callables posted from worker threads on the thread owning the dispatcher"""
+
+    posted = QtCore.Signal(object)
+
+    def __init__(self, parent=None):
+        super(GuiDispatcher, self).__init__(parent)
+        self.posted.connect(self._run, QtCore.Qt.QueuedConnection)
+
+    def post(self, func):
+        self.posted.emit(func)
+
+    def _run(self, func):
+        func()
+
 class Window(QtWidgets.QTreeView):
     def __init__(self, options):
         super(Window, self).__init__()
@@ -211,6 +154,7 @@ class Window(QtWidgets.QTreeView):
         self.resize(700,600)
         self.setAlternatingRowColors(True)
         self.setUniformRowHeights(True)
+        self.view_state = TreeViewState(self, default_depth=1)
 
     def setFilePath(self, path):
         print(path)
@@ -239,12 +183,11 @@ class Window(QtWidgets.QTreeView):
 
         model = AAFModel(root)
 
-        self.setModel(model)
+        self.view_state.setModel(model, file_path)
 
         self.setWindowTitle(file_path)
-        self.expandToDepth(1)
-        self.resizeColumnToContents(0)
-        self.resizeColumnToContents(1)
+        self.setColumnWidth(0, estimate_column_width(self, 0))
+        self.setColumnWidth(1, estimate_column_width(self, 1))
 
 if __name__ == "__main__":
 
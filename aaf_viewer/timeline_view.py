@@ -0,0 +1,515 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+)
+import bisect
+import math
+from PySide2 import QtCore, QtWidgets, QtGui
+import aaf2
+from aaf2.mobid import MobID
+import classdef_cache
+
+TRACK_HEIGHT = 22
+HEADER_WIDTH = 90
+RULER_HEIGHT = 18
+MIN_CLIP_WIDTH = 3  # Narrower clips are merged into level-of-detail blocks
+
+CLIP_COLORS = {
+    "SourceClip": QtGui.QColor(88, 128, 186),
+    "Transition": QtGui.QColor(214, 150, 60),
+    "OperationGroup": QtGui.QColor(150, 104, 180),
+    "Selector": QtGui.QColor(96, 160, 120),
+    "EssenceGroup": QtGui.QColor(96, 160, 120),
+}
+DEFAULT_CLIP_COLOR = QtGui.QColor(140, 140, 140)
+DENSE_COLOR = QtGui.QColor(110, 110, 120)
+
+
+def slot_layout(slot):
+    """
+    Return (in sequence, starts, lengths, filler indexes, transition indexes) of a slot's components
+
+    Plain data, so it can be built on an AAFReaderPool worker, see track_layout.
+    """
+    segment = slot.segment
+    if isinstance(segment, aaf2.components.Sequence):
+        in_sequence = True
+        components = segment.components
+    else:
+        in_sequence = False
+        components = [segment] if segment is not None else []
+
+    starts = []
+    lengths = []
+    fillers = []
+    transitions = []
+    position = 0
+    for component in components:
+        length = component.get('Length')
+        length = length.value if length is not None else 0
+        length = length or 0
+
+        if isinstance(component, aaf2.components.Filler):
+            fillers.append(len(starts))
+
+        # Transitions overlap the end of the previous clip and the start of the next one
+        if isinstance(component, aaf2.components.Transition):
+            transitions.append(len(starts))
+            position -= length
+            starts.append(position)
+            lengths.append(length)
+            continue
+
+        starts.append(position)
+        lengths.append(length)
+        position += length
+    return in_sequence, starts, lengths, fillers, transitions
+
+def track_layout(aaf_file, mob_urn, row):
+    """slot_layout of slot row of a mob, read through a worker's own handle"""
+    mob = aaf_file.content.mobs.get(MobID(mob_urn))
+    return slot_layout(mob.slots[row])
+
+
+class TimelineTrack(object):
+    """
+    Clip layout of one mob slot
+
+    Component offsets are computed the first time the track is drawn, on a reader pool worker
+    when the canvas has one. Clip names and classes are only read when a clip is wide enough
+    on screen to be labelled.
+    """
+
+    def __init__(self, slot, row, mob_urn=None):
+        self.slot = slot
+        self.row = row  # Position of the slot in the mob's Slots property
+        self.mob_urn = mob_urn
+        self.name = slot.name or "Slot %s" % slot.slot_id
+        try:
+            self.edit_rate = float(slot.edit_rate) or 1.0
+        except Exception:
+            self.edit_rate = 1.0
+
+        self.loaded = False
+        self.pending = False  # Layout requested from a worker
+        self.in_sequence = False
+        self.starts = []
+        self.lengths = []
+        self.fillers = []  # Indexes of Filler components, which are never painted
+        self.transitions = set()
+        self.info = {}
+        self.end = 0
+
+    def setLayout(self, layout):
+        self.in_sequence, self.starts, self.lengths, self.fillers, transitions = layout
+        self.transitions = set(transitions)
+        self.end = max([start + length for start, length in zip(self.starts, self.lengths)] or [0])
+        self.loaded = True
+        self.pending = False
+
+    def load(self):
+        """Build the layout on this thread"""
+        if not self.loaded:
+            self.setLayout(slot_layout(self.slot))
+
+    def component(self, i):
+        segment = self.slot.segment
+        if self.in_sequence:
+            return segment.components.get(i)
+        return segment
+
+    def clipInfo(self, i):
+        """Return (class name, label) for component i"""
+        info = self.info.get(i)
+        if info is None:
+            component = self.component(i)
+            class_name = classdef_cache.class_name(component)
+            label = class_name
+            if isinstance(component, aaf2.components.SourceClip):
+                try:
+                    mob = component.mob
+                except Exception:
+                    mob = None
+                if mob is not None and mob.name:
+                    label = mob.name
+            info = (class_name, label)
+            self.info[i] = info
+        return info
+
+    def duration(self):
+        """Length of the slot in seconds, read from the segment unless it has no usable Length"""
+        segment = self.slot.segment
+        length = segment.get('Length') if segment is not None else None
+        if length is not None and length.value:
+            return length.value / self.edit_rate
+        if not self.loaded:
+            return None
+        return self.end / self.edit_rate
+
+    def clipAt(self, units):
+        """Index of the clip under position units, transitions win over the clips they overlap"""
+        i = bisect.bisect_right(self.starts, units) - 1
+        best = None
+        # A transition only overlaps its direct neighbours
+        for j in (i, i - 1, i - 2):
+            if j >= 0 and self.starts[j] <= units < self.starts[j] + self.lengths[j]:
+                if j in self.transitions:
+                    return j
+                if best is None:
+                    best = j
+        return best
+
+    def path(self, i):
+        """Property path from the mob to component i, as used by AAFModel.indexForPath"""
+        steps = ['Slots', self.row, 'Segment', 0]
+        if self.in_sequence:
+            steps += ['Components', i]
+        return steps
+
+
+class TimelineCanvas(QtWidgets.QWidget):
+    """Draws only the tracks and the time range currently on screen"""
+
+    clipClicked = QtCore.Signal(object)
+    scrolled = QtCore.Signal()
+
+    def __init__(self, parent=None):
+        super(TimelineCanvas, self).__init__(parent)
+        self.tracks = []
+        self.view_start = 0.0  # Seconds at the left edge of the clip area
+        self.pixels_per_second = 10.0
+        self.first_track = 0
+        self.selected = None
+        self.drag_origin = None
+        self.dragged = False
+        self.reader_pool = None  # Builds track layouts off the GUI thread when set
+        self.fit_pending = False  # Fit again when layouts of tracks without a usable Length arrive
+        self.setMouseTracking(True)
+        self.setFocusPolicy(QtCore.Qt.WheelFocus)
+        self.setMinimumHeight(RULER_HEIGHT + TRACK_HEIGHT * 3)
+
+    def setTracks(self, tracks):
+        self.tracks = tracks
+        self.first_track = 0
+        self.selected = None
+        self.scrolled.emit()
+        self.fit()
+
+    def visibleTrackCount(self):
+        return max(1, (self.height() - RULER_HEIGHT) // TRACK_HEIGHT)
+
+    def setFirstTrack(self, value):
+        self.first_track = max(0, min(value, len(self.tracks) - 1))
+        self.update()
+
+    def fit(self):
+        """Zoom to show the longest track"""
+        durations = []
+        for track in self.tracks:
+            if track.duration() is None and self.reader_pool is None:
+                track.load()
+            durations.append(track.duration())
+        self.fit_pending = None in durations
+        duration = max([d for d in durations if d] or [0.0])
+        width = max(1, self.width() - HEADER_WIDTH)
+        self.view_start = 0.0
+        self.pixels_per_second = width / duration if duration else 10.0
+        self.update()
+
+    def toX(self, seconds):
+        return HEADER_WIDTH + (seconds - self.view_start) * self.pixels_per_second
+
+    def toSeconds(self, x):
+        return self.view_start + (x - HEADER_WIDTH) / self.pixels_per_second
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        palette = self.palette()
+        painter.fillRect(self.rect(), palette.base())
+
+        left = self.toSeconds(HEADER_WIDTH)
+        right = self.toSeconds(self.width())
+
+        self._paintRuler(painter, left, right)
+
+        last_track = min(len(self.tracks), self.first_track + self.visibleTrackCount() + 1)
+        for n in range(self.first_track, last_track):
+            top = RULER_HEIGHT + (n - self.first_track) * TRACK_HEIGHT
+            self._paintTrack(painter, self.tracks[n], n, top, left, right)
+
+        painter.end()
+
+    def _paintRuler(self, painter, left, right):
+        painter.fillRect(0, 0, self.width(), RULER_HEIGHT, self.palette().window())
+        # One tick roughly every 80 pixels, rounded to 1/2/5 steps
+        raw = 80.0 / self.pixels_per_second
+        magnitude = 10 ** math.floor(math.log10(raw)) if raw > 0 else 1
+        step = magnitude
+        for factor in (1, 2, 5, 10):
+            step = magnitude * factor
+            if step >= raw:
+                break
+
+        painter.setPen(self.palette().text().color())
+        t = math.floor(left / step) * step
+        while t <= right:
+            x = int(self.toX(t))
+            if x >= HEADER_WIDTH:
+                painter.drawLine(x, RULER_HEIGHT - 5, x, RULER_HEIGHT)
+                minutes, seconds = divmod(t, 60)
+                painter.drawText(x + 2, RULER_HEIGHT - 6, "%d:%05.2f" % (minutes, seconds))
+            t += step
+
+    def requestLayout(self, track):
+        """Load the layout of track, in the background when there is a reader pool"""
+        if track.loaded or track.pending:
+            return
+        if self.reader_pool is None or track.mob_urn is None:
+            track.load()
+            return
+        track.pending = True
+        self.reader_pool.submit(track_layout, track.mob_urn, track.row,
+                                callback=lambda layout: self._onLayout(track, layout),
+                                errback=lambda error: self._onLayout(track, (False, [], [], [], [])))
+
+    def _onLayout(self, track, layout):
+        track.setLayout(layout)
+        if track not in self.tracks:
+            return
+        if self.fit_pending:
+            self.fit()
+        else:
+            self.update()
+
+    def _paintTrack(self, painter, track, n, top, left, right):
+        self.requestLayout(track)
+
+        painter.fillRect(0, top, HEADER_WIDTH, TRACK_HEIGHT - 1, self.palette().window())
+        painter.setPen(self.palette().text().color())
+        painter.drawText(QtCore.QRect(4, top, HEADER_WIDTH - 8, TRACK_HEIGHT),
+                         QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft, track.name)
+
+        if not track.loaded:
+            painter.drawText(QtCore.QRect(HEADER_WIDTH + 4, top, self.width() - HEADER_WIDTH, TRACK_HEIGHT),
+                             QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft, "Loading...")
+            return
+
+        painter.save()
+        painter.setClipRect(HEADER_WIDTH, top, self.width() - HEADER_WIDTH, TRACK_HEIGHT)
+
+        rate = track.edit_rate
+        starts = track.starts
+        lengths = track.lengths
+        fillers = track.fillers
+        count = len(starts)
+        units_left = left * rate
+        units_right = right * rate
+        units_per_pixel = rate / self.pixels_per_second
+
+        i = max(0, bisect.bisect_right(starts, units_left) - 1)
+        # Step back over clips that start earlier but still overlap the left edge
+        while i > 0 and starts[i - 1] + lengths[i - 1] > units_left:
+            i -= 1
+
+        y = top + 1
+        h = TRACK_HEIGHT - 3
+        while i < count:
+            start = starts[i]
+            if start >= units_right:
+                break
+            end = start + lengths[i]
+            x0 = self.toX(start / rate)
+            x1 = self.toX(end / rate)
+
+            if x1 - x0 >= MIN_CLIP_WIDTH:
+                self._paintClip(painter, track, n, i, x0, x1, y, h)
+                i += 1
+                continue
+
+            # Empty track time stays empty, however narrow
+            k = bisect.bisect_left(fillers, i)
+            if k < len(fillers) and fillers[k] == i:
+                i += 1
+                continue
+
+            # Level of detail: every clip starting inside the next couple of pixels becomes one block
+            block_end = math.floor(x0) + MIN_CLIP_WIDTH
+            units_end = start + (block_end - x0) * units_per_pixel
+            j = bisect.bisect_left(starts, units_end, i + 1, count)
+            # A wide clip starting inside the block is still drawn on its own
+            if j - 1 > i and lengths[j - 1] >= MIN_CLIP_WIDTH * units_per_pixel:
+                j -= 1
+            # and the block ends at the next filler
+            if k < len(fillers) and fillers[k] < j:
+                j = fillers[k]
+                block_end = min(block_end, self.toX(starts[j] / rate))
+            painter.fillRect(QtCore.QRectF(x0, y, block_end - x0, h), DENSE_COLOR)
+            i = j
+
+        painter.restore()
+
+    def _paintClip(self, painter, track, n, i, x0, x1, y, h):
+        class_name, label = track.clipInfo(i)
+        if class_name == "Filler":
+            return
+
+        rect = QtCore.QRectF(x0, y, x1 - x0 - 1, h)
+        if class_name == "Transition":
+            rect = QtCore.QRectF(x0, y + h * 0.5, x1 - x0, h * 0.5)
+        painter.fillRect(rect, CLIP_COLORS.get(class_name, DEFAULT_CLIP_COLOR))
+
+        if self.selected == (n, i):
+            painter.setPen(QtGui.QPen(self.palette().highlight().color(), 2))
+            painter.drawRect(rect)
+
+        if rect.width() > 30 and class_name != "Transition":
+            painter.setPen(QtCore.Qt.white)
+            visible = rect.intersected(QtCore.QRectF(HEADER_WIDTH, y, self.width(), h))
+            painter.drawText(visible.adjusted(3, 0, -2, 0), QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft, label)
+
+    def hitTest(self, pos):
+        """Return (track number, component index) under pos or None"""
+        if pos.x() < HEADER_WIDTH or pos.y() < RULER_HEIGHT:
+            return None
+        n = self.first_track + (pos.y() - RULER_HEIGHT) // TRACK_HEIGHT
+        if n >= len(self.tracks):
+            return None
+        track = self.tracks[n]
+        if not track.loaded:
+            return None
+        units = self.toSeconds(pos.x()) * track.edit_rate
+        i = track.clipAt(units)
+        if i is None:
+            return None
+        return (n, i)
+
+    def zoom(self, factor, x):
+        """Zoom by factor keeping the time under x fixed"""
+        anchor = self.toSeconds(x)
+        self.fit_pending = False
+        self.pixels_per_second = min(max(self.pixels_per_second * factor, 1e-4), 1e5)
+        self.view_start = anchor - (x - HEADER_WIDTH) / self.pixels_per_second
+        self.update()
+
+    def wheelEvent(self, event):
+        delta = event.angleDelta().y() or event.angleDelta().x()
+        modifiers = event.modifiers()
+        if modifiers & QtCore.Qt.ControlModifier:
+            self.zoom(1.25 ** (delta / 120.0), event.pos().x())
+        elif modifiers & QtCore.Qt.ShiftModifier or event.angleDelta().x():
+            self.fit_pending = False
+            self.view_start -= delta / self.pixels_per_second
+            self.update()
+        else:
+            self.setFirstTrack(self.first_track - int(delta / 120))
+            self.scrolled.emit()
+        event.accept()
+
+    def mousePressEvent(self, event):
+        if event.button() == QtCore.Qt.LeftButton:
+            self.drag_origin = (event.pos(), self.view_start, self.first_track)
+            self.dragged = False
+
+    def mouseMoveEvent(self, event):
+        if self.drag_origin is None:
+            return
+        origin, view_start, first_track = self.drag_origin
+        delta = event.pos() - origin
+        if delta.manhattanLength() > QtWidgets.QApplication.startDragDistance():
+            self.dragged = True
+        if self.dragged:
+            self.fit_pending = False
+            self.view_start = view_start - delta.x() / self.pixels_per_second
+            self.first_track = max(0, min(first_track - delta.y() // TRACK_HEIGHT, len(self.tracks) - 1))
+            self.scrolled.emit()
+            self.update()
+
+    def mouseReleaseEvent(self, event):
+        if event.button() != QtCore.Qt.LeftButton:
+            return
+        dragged = self.dragged
+        self.drag_origin = None
+        self.dragged = False
+        if dragged:
+            return
+
+        hit = self.hitTest(event.pos())
+        if hit is None:
+            return
+        self.selected = hit
+        self.update()
+        n, i = hit
+        self.clipClicked.emit(self.tracks[n].path(i))
+
+
+class TimelineWidget(QtWidgets.QWidget):
+    """Timeline tool: composition mob picker, clip canvas and track scroll bar"""
+
+    clipClicked = QtCore.Signal(object, object)
+
+    def __init__(self, parent=None):
+        super(TimelineWidget, self).__init__(parent)
+        self.mobs = []
+        self.mob = None
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        controls = QtWidgets.QHBoxLayout()
+        controls.addWidget(QtWidgets.QLabel("Composition "))
+        self.mob_combo = QtWidgets.QComboBox()
+        self.mob_combo.setSizeAdjustPolicy(QtWidgets.QComboBox.AdjustToMinimumContentsLengthWithIcon)
+        self.mob_combo.currentIndexChanged.connect(self._onMobChanged)
+        controls.addWidget(self.mob_combo, 1)
+
+        fit_button = QtWidgets.QPushButton("Fit")
+        controls.addWidget(fit_button)
+        layout.addLayout(controls)
+
+        body = QtWidgets.QHBoxLayout()
+        self.canvas = TimelineCanvas()
+        self.canvas.setMinimumHeight(200)
+        fit_button.clicked.connect(self.canvas.fit)
+        body.addWidget(self.canvas, 1)
+
+        self.track_scroll = QtWidgets.QScrollBar(QtCore.Qt.Vertical)
+        self.track_scroll.valueChanged.connect(self.canvas.setFirstTrack)
+        body.addWidget(self.track_scroll)
+        layout.addLayout(body)
+
+        self.canvas.scrolled.connect(self._updateScroll)
+        self.canvas.clipClicked.connect(lambda path: self.clipClicked.emit(self.mob, path))
+
+    def setReaderPool(self, reader_pool):
+        """Build track layouts on reader_pool workers from now on, None builds them on this thread"""
+        self.canvas.reader_pool = reader_pool
+
+    def setMobs(self, mobs):
+        """Offer mobs in the picker and show the first one"""
+        self.mobs = list(mobs)
+        self.mob_combo.blockSignals(True)
+        self.mob_combo.clear()
+        self.mob_combo.addItems([mob.name or str(mob.mob_id) for mob in self.mobs])
+        self.mob_combo.blockSignals(False)
+        self._onMobChanged(0)
+
+    def setMob(self, mob):
+        self.mob = mob
+        tracks = []
+        if mob is not None:
+            for row, slot in enumerate(mob.slots):
+                if slot.get('Segment') is not None:
+                    tracks.append(TimelineTrack(slot, row, mob.mob_id.urn))
+        self.canvas.setTracks(tracks)
+
+    def _onMobChanged(self, index):
+        self.setMob(self.mobs[index] if 0 <= index < len(self.mobs) else None)
+
+    def _updateScroll(self):
+        self.track_scroll.blockSignals(True)
+        self.track_scroll.setRange(0, max(0, len(self.canvas.tracks) - 1))
+        self.track_scroll.setPageStep(self.canvas.visibleTrackCount())
+        self.track_scroll.setValue(self.canvas.first_track)
+        self.track_scroll.blockSignals(False)
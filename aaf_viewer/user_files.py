@@ -0,0 +1,43 @@
+# JSON files the viewer keeps between sessions: caches, settings and scan state.
+# Written to a temporary file and renamed, so a crash never leaves half a file behind.
+
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+)
+import os
+import json
+
+def user_dir():
+    return os.path.join(os.path.expanduser("~"), ".aaf_viewer")
+
+def user_path(name):
+    return os.path.join(user_dir(), name)
+
+def read_json(path):
+    """Return the data in path, None when it is missing or unreadable"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+def write_json(path, data, indent=None):
+    """Replace path with data atomically, creating its directory. Raises IOError/OSError."""
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, indent=indent)
+        os.replace(temp_path, path)
+    except (IOError, OSError):
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        raise
@@ -0,0 +1,191 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+)
+from PySide2 import QtCore
+from PySide2 import QtWidgets
+
+# Top level rows are only expanded by default when there are at most this many of them
+DEFAULT_EXPAND_ROWS = 64
+# Rows measured when estimating a column width
+WIDTH_SAMPLES = 64
+
+class ViewState(object):
+    """
+    Expanded items, current item and scroll position of one view
+
+    Items are kept as paths of TreeItem.step() identities from the model root: property names,
+    MobIDs for mobs and rows for everything else. They stay valid when the file is reloaded or
+    mobs are reordered, and resolving one only creates the items along it.
+    """
+
+    def __init__(self):
+        self.children = {}  # Expanded path -> steps of its expanded children
+        self.current = None
+        self.top = None
+
+    def add(self, path):
+        self.children.setdefault(path[:-1], set()).add(path[-1])
+
+    def discard(self, path):
+        steps = self.children.get(path[:-1])
+        if steps is not None:
+            steps.discard(path[-1])
+
+class TreeViewState(QtCore.QObject):
+    """
+    Remembers what was expanded in a QTreeView for each view key, and restores it lazily
+
+    Only children of an item that is being expanded are restored, so restoring never walks rows
+    that stay hidden. Replaces expandToDepth(), which visits every loaded row.
+    """
+
+    def __init__(self, tree, default_depth=0, parent=None):
+        super(TreeViewState, self).__init__(parent or tree)
+        self.tree = tree
+        self.default_depth = default_depth
+        self.states = {}
+        self.state = None
+        tree.expanded.connect(self._onExpanded)
+        tree.collapsed.connect(self._onCollapsed)
+
+    def pathFor(self, index):
+        model = index.model()
+        steps = []
+        while index.isValid():
+            steps.append(model.getItem(index).step())
+            index = index.parent()
+        return tuple(reversed(steps))
+
+    def indexFor(self, path):
+        model = self.tree.model()
+        index = QtCore.QModelIndex()
+        for step in path:
+            row = model.getItem(index).rowForStep(step)
+            if row is None:
+                return QtCore.QModelIndex()
+            index = model.index(row, 0, index)
+        return index
+
+    def save(self):
+        """Store current item and scroll position of the shown view"""
+        if self.state is None or self.tree.model() is None:
+            return
+        current = self.tree.currentIndex()
+        self.state.current = self.pathFor(current) if current.isValid() else None
+        top = self.tree.indexAt(QtCore.QPoint(1, 1))
+        self.state.top = self.pathFor(top) if top.isValid() else None
+
+    def setModel(self, model, key):
+        """Show model and restore what was expanded the last time key was shown"""
+        self.save()
+        state = self.states.get(key)
+        fresh = state is None
+        if fresh:
+            state = self.states[key] = ViewState()
+
+        # Signals from the new model must not be recorded before it is attached
+        self.state = None
+        self.tree.setModel(model)
+        self.state = state
+
+        if fresh:
+            self._expandDefault(QtCore.QModelIndex(), 0)
+            return
+
+        self._restoreChildren(QtCore.QModelIndex(), ())
+        if state.top:
+            top = self.indexFor(state.top)
+            if top.isValid():
+                self.tree.scrollTo(top, QtWidgets.QAbstractItemView.PositionAtTop)
+        if state.current:
+            current = self.indexFor(state.current)
+            if current.isValid():
+                self.tree.setCurrentIndex(current)
+
+    def clear(self):
+        self.states = {}
+        self.state = None
+
+    def _expandDefault(self, index, depth):
+        model = self.tree.model()
+        rows = model.rowCount(index)
+        if rows > DEFAULT_EXPAND_ROWS:
+            return
+        for row in range(rows):
+            child = model.index(row, 0, index)
+            self.tree.expand(child)
+            if depth < self.default_depth:
+                self._expandDefault(child, depth + 1)
+
+    def _restoreChildren(self, index, path):
+        steps = self.state.children.get(path)
+        if not steps:
+            return
+        model = self.tree.model()
+        item = model.getItem(index)
+        for step in list(steps):
+            row = item.rowForStep(step)
+            if row is None:
+                continue
+            # Emits expanded, which restores the next level below
+            self.tree.expand(model.index(row, 0, index))
+
+    def _onExpanded(self, index):
+        if self.state is None:
+            return
+        path = self.pathFor(index)
+        self.state.add(path)
+        self._restoreChildren(index, path)
+
+    def _onCollapsed(self, index):
+        if self.state is None:
+            return
+        self.state.discard(self.pathFor(index))
+
+def visible_indexes(tree, limit=WIDTH_SAMPLES):
+    """Yield the column 0 indexes of the rows currently shown in the viewport"""
+    index = tree.indexAt(QtCore.QPoint(1, 1))
+    height = tree.viewport().height()
+    count = 0
+    while index.isValid() and count < limit:
+        if tree.visualRect(index).top() > height:
+            break
+        yield index
+        count += 1
+        index = tree.indexBelow(index)
+
+def estimate_column_width(tree, column, samples=WIDTH_SAMPLES):
+    """
+    Width fitting column from the visible rows and an even sample of the top level rows
+
+    resizeColumnToContents() asks for the size of every loaded row, this measures at most
+    2 x samples of them.
+    """
+    model = tree.model()
+    if model is None:
+        return tree.columnWidth(column)
+
+    indexes = list(visible_indexes(tree, samples))
+    rows = model.rowCount()
+    stride = max(1, rows // samples)
+    indexes.extend(model.index(row, 0) for row in range(0, rows, stride)[:samples])
+
+    indentation = tree.indentation()
+    width = 0
+    for index in indexes:
+        index = index.sibling(index.row(), column)
+        if not index.isValid():
+            continue
+        hint = tree.sizeHintForIndex(index).width()
+        if column == 0:
+            depth = 1 if tree.rootIsDecorated() else 0
+            parent = index.parent()
+            while parent.isValid():
+                depth += 1
+                parent = parent.parent()
+            hint += depth * indentation
+        width = max(width, hint)
+    return width or tree.columnWidth(column)
@@ -0,0 +1,103 @@
+"""
+Startup benchmark for the AAF Viewer
+
+Measures, in fresh interpreters:
+  - wall time until the main window has been shown and the event loop is running
+  - per module import cost from ``python -X importtime`` for that same startup
+  - import time of the Qt-free core (aaf_tree, mob_index) for headless callers
+
+    python benchmarks/startup_time.py [--runs 5] [--target 300]
+"""
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+)
+import os
+import sys
+import time
+import subprocess
+from optparse import OptionParser
+
+VIEWER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'aaf_viewer')
+
+SHOW_WINDOW = """
+import sys
+sys.path.insert(0, %r)
+from PySide2 import QtCore, QtWidgets
+import aaf_viewer
+app = QtWidgets.QApplication(sys.argv)
+viewer = aaf_viewer.AAFViewer()
+viewer.show()
+QtCore.QTimer.singleShot(0, app.quit)
+app.exec_()
+print(",".join(sorted(m for m in ("aaf2", "qt_aafmodel", "timeline_view", "aaf_access") if m in sys.modules)))
+""" % VIEWER_DIR
+
+IMPORT_CORE = """
+import sys
+sys.path.insert(0, %r)
+import aaf_tree
+import mob_index
+print("PySide2" in sys.modules)
+""" % VIEWER_DIR
+
+def timed(code, *flags):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + list(flags) + ["-c", code],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return elapsed, result.stdout.strip(), result.stderr
+
+def import_costs(stderr):
+    """Parse -X importtime output into (cumulative us, module) for top level imports"""
+    costs = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            cumulative = int(fields[1])
+        except ValueError:
+            continue
+        name = fields[2]
+        # Only direct imports of the startup script, nested ones are indented
+        if not name.startswith("  "):
+            costs.append((cumulative, name.strip()))
+    costs.sort(reverse=True)
+    return costs
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-n', '--runs', type="int", default=5)
+    parser.add_option('-t', '--target', type="float", default=300.0, help="milliseconds")
+    (options, args) = parser.parse_args()
+
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY") and not os.environ.get("QT_QPA_PLATFORM"):
+        os.environ["QT_QPA_PLATFORM"] = "offscreen"
+
+    times = []
+    loaded = ""
+    for i in range(options.runs):
+        elapsed, loaded, _ = timed(SHOW_WINDOW)
+        times.append(elapsed * 1000.0)
+    best = min(times)
+    print("window shown:     best %.0f ms, median %.0f ms (target %.0f ms) %s" % (
+        best, sorted(times)[len(times) // 2], options.target, "OK" if best <= options.target else "SLOW"))
+    print("deferred modules loaded at startup: %s" % (loaded or "none"))
+
+    _, _, stderr = timed(SHOW_WINDOW, "-X", "importtime")
+    print("slowest imports at startup:")
+    for cumulative, name in import_costs(stderr)[:10]:
+        print("  %8.1f ms  %s" % (cumulative / 1000.0, name))
+
+    elapsed, qt_loaded, _ = timed(IMPORT_CORE)
+    print("headless core:    %.0f ms%s" % (elapsed * 1000.0, ", pulls in PySide2!" if qt_loaded == "True" else ""))
+
+    return 0 if best <= options.target else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Stress test for aaf_access.AAFReaderPool
+
+Runs search, export and validation jobs concurrently on worker handles while the main
+thread keeps browsing the file through its own handle, checks every result against a
+single threaded run and reports read throughput per worker count.
+
+Decoding holds the GIL, so threads are only expected to keep the throughput of the first
+worker count while processes should speed up with the cores available. Worker counts that
+miss the expected scaling are flagged and make the exit status 2.
+
+    python benchmarks/stress_concurrent_read.py file.aaf [--processes] [--workers 1,2,4,8]
+"""
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+)
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'aaf_viewer'))
+
+import aaf2
+from aaf2.mobid import MobID
+from aaf_access import AAFReaderPool
+
+CHUNK_SIZE = 64
+# Fraction of linear speedup over the cores in use that processes are expected to reach
+PROCESS_EFFICIENCY = 0.6
+# Throughput threads are expected to keep relative to the first worker count
+THREAD_SCALING = 0.9
+
+def walk(obj):
+    """Yield obj and every object strongly referenced below it"""
+    yield obj
+    for p in obj.properties():
+        if isinstance(p, aaf2.properties.StrongRefProperty):
+            child = p.value
+            if child is not None:
+                for item in walk(child):
+                    yield item
+        elif isinstance(p, (aaf2.properties.StrongRefVectorProperty, aaf2.properties.StrongRefSetProperty)):
+            for child in p:
+                for item in walk(child):
+                    yield item
+
+def mobs_for(f, urns):
+    for urn in urns:
+        yield f.content.mobs.get(MobID(urn))
+
+def search_job(f, urns, text):
+    found = []
+    for mob in mobs_for(f, urns):
+        for obj in walk(mob):
+            name = obj.get('Name')
+            if name is not None and text in str(name.value):
+                found.append((mob.mob_id.urn, obj.classdef.class_name))
+    return found
+
+def export_job(f, urns):
+    digest = hashlib.sha1()
+    for mob in mobs_for(f, urns):
+        for obj in walk(mob):
+            values = {}
+            for p in obj.properties():
+                # Strong references are exported by the walk itself, their repr holds addresses
+                if isinstance(p, (aaf2.properties.StrongRefProperty, aaf2.properties.StrongRefVectorProperty,
+                                  aaf2.properties.StrongRefSetProperty)):
+                    continue
+                try:
+                    value = p.value
+                    # Weak references resolve to definitions, export their identity instead of their repr
+                    if isinstance(value, aaf2.core.AAFObject):
+                        value = getattr(value, 'auid', None) or value.classdef.class_name
+                    values[p.name] = str(value)
+                except Exception:
+                    values[p.name] = "Error"
+            digest.update(json.dumps(values, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+def validate_job(f, urns):
+    broken = []
+    for mob in mobs_for(f, urns):
+        for obj in walk(mob):
+            if isinstance(obj, aaf2.components.SourceClip):
+                mob_id = obj.mob_id
+                if mob_id and int(mob_id) and f.content.mobs.get(mob_id) is None:
+                    broken.append((mob.mob_id.urn, mob_id.urn))
+    return broken
+
+def jobs_for(urns):
+    chunks = [urns[i:i + CHUNK_SIZE] for i in range(0, len(urns), CHUNK_SIZE)]
+    jobs = []
+    for chunk in chunks:
+        jobs.append((search_job, (chunk, "A0")))
+        jobs.append((export_job, (chunk,)))
+        jobs.append((validate_job, (chunk,)))
+    return jobs
+
+def browse(path, stop):
+    """Simulate the user clicking around the tree on the GUI handle"""
+    f = aaf2.open(path, 'r')
+    count = 0
+    while not stop.is_set():
+        for obj in walk(f.content):
+            count += 1
+            if stop.is_set():
+                break
+    f.close()
+    return count
+
+def expected_scaling(workers, base_workers, processes):
+    """Minimum throughput for workers relative to the run with base_workers"""
+    if not processes:
+        return THREAD_SCALING
+    cpus = os.cpu_count() or 1
+
+    def speedup(n):
+        return max(1.0, PROCESS_EFFICIENCY * min(n, cpus))
+    return speedup(workers) / speedup(base_workers)
+
+def run(path, jobs, workers, processes):
+    pool = AAFReaderPool(path, max_workers=workers, processes=processes)
+    start = time.perf_counter()
+    futures = [pool.submit(func, *args) for func, args in jobs]
+    results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return results, elapsed
+
+def main():
+    parser = OptionParser(usage="%prog [options] file.aaf")
+    parser.add_option('-p', '--processes', action="store_true", default=False)
+    parser.add_option('-w', '--workers', default="1,2,4,8")
+    (options, args) = parser.parse_args()
+    if not args:
+        parser.error("not enough arguments")
+    path = args[0]
+
+    with aaf2.open(path, 'r') as f:
+        urns = sorted(mob.mob_id.urn for mob in f.content.mobs)
+        reference = [func(f, *args) for func, args in jobs_for(urns)]
+
+    jobs = jobs_for(urns)
+    print("%d mobs, %d jobs, %s" % (len(urns), len(jobs), "processes" if options.processes else "threads"))
+
+    cpus = os.cpu_count() or 1
+    counts = [int(n) for n in options.workers.split(',')]
+    if max(counts) > cpus:
+        print("only %d CPUs, worker counts above that are not expected to scale" % cpus)
+
+    base = None
+    missed = 0
+    for workers in counts:
+        stop = threading.Event()
+        browsed = []
+        browser = threading.Thread(target=lambda: browsed.append(browse(path, stop)))
+        browser.start()
+
+        results, elapsed = run(path, jobs, workers, options.processes)
+
+        stop.set()
+        browser.join()
+
+        if results != reference:
+            print("workers=%d: RESULTS DIFFER FROM SINGLE THREADED RUN" % workers)
+            return 1
+
+        rate = len(urns) * 3 / elapsed
+        if base is None:
+            base, base_workers = rate, workers
+            verdict = ""
+        else:
+            target = expected_scaling(workers, base_workers, options.processes)
+            verdict = "  expected x%.2f" % target
+            if rate / base < target:
+                verdict += "  BELOW TARGET"
+                missed += 1
+        print("workers=%d  %.2fs  %.0f mob jobs/s  scaling x%.2f%s  (browsed %d objects meanwhile)" % (
+            workers, elapsed, rate, rate / base, verdict, browsed[0] if browsed else 0))
+    return 2 if missed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark of TreeItem.setup throughput with and without the class definition cache
+
+Expands every node of a view the way the tree does when rows are shown and reports
+nodes per second, first resolving class names straight from the metadictionary and
+then through classdef_cache. Class name resolution on its own is timed over the
+same objects, since setup also pays for value decoding that no cache removes.
+
+    python benchmarks/treeitem_setup.py file.aaf [--view content|metadict|dictionary] [--limit 200000]
+"""
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+)
+import os
+import sys
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'aaf_viewer'))
+
+import aaf2
+import aaf_tree
+import classdef_cache
+
+def expand(root, limit, objects=None):
+    """Set up root and its descendants, return the node count"""
+    queue = [aaf_tree.TreeItem(root)]
+    count = 0
+    while queue and count < limit:
+        item = queue.pop()
+        item.setup()
+        count += 1
+        if objects is not None and isinstance(item.item, aaf2.core.AAFObject):
+            objects.append(item.item)
+        for row in range(item.childCount()):
+            child = item.child(row)
+            if child is not None:
+                queue.append(child)
+    return count
+
+def uncached_class_name(obj):
+    return obj.classdef.class_name
+
+def measure(path, view, limit, class_name):
+    """Return (nodes, setup seconds, objects, class name seconds)"""
+    with aaf2.open(path, 'r') as f:
+        root = {"content": f.content, "metadict": f.metadict, "dictionary": f.dictionary}[view]
+        original = classdef_cache.class_name
+        classdef_cache.class_name = class_name
+        try:
+            objects = []
+            start = time.perf_counter()
+            count = expand(root, limit, objects)
+            elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for obj in objects:
+                class_name(obj)
+            names_elapsed = time.perf_counter() - start
+        finally:
+            classdef_cache.class_name = original
+    return count, elapsed, len(objects), names_elapsed
+
+def main():
+    parser = OptionParser(usage="%prog [options] file.aaf")
+    parser.add_option('-v', '--view', default="content")
+    parser.add_option('-l', '--limit', type="int", default=200000)
+    (options, args) = parser.parse_args()
+    if not args:
+        parser.error("not enough arguments")
+
+    runs = [("uncached", uncached_class_name), ("cached (cold)", classdef_cache.class_name),
+            ("cached (warm)", classdef_cache.class_name)]
+    classdef_cache.clear()
+    base = None
+    names_base = None
+    for label, class_name in runs:
+        count, elapsed, objects, names_elapsed = measure(args[0], options.view, options.limit, class_name)
+        rate = count / elapsed
+        names_rate = objects / names_elapsed if names_elapsed else 0.0
+        base = base or rate
+        names_base = names_base or names_rate
+        print("%-14s setup %7d nodes %9.0f nodes/s x%.2f | class_name %7d objects %10.0f/s x%.2f" % (
+            label, count, rate, rate / base, objects, names_rate, names_rate / names_base))
+
+if __name__ == "__main__":
+    sys.exit(main())